@@ -1,12 +1,30 @@
 import calendar
+import sys
+
+import numpy as np
 import pandas as pd
 
-customers_df = pd.read_csv("data/original/customers.csv")
-products_df = pd.read_csv("data/original/products.csv")
-transactions_df = pd.read_csv("data/original/transactions.csv")
+CUSTOMERS_PATH = "data/original/customers.csv"
+PRODUCTS_PATH = "data/original/products.csv"
+TRANSACTIONS_PATH = "data/original/transactions.csv"
+
 
+def load_data():
+    """
+    Read the raw customers, products and transactions CSVs. Called explicitly
+    rather than at import, so importing this module never parses the files.
+    """
+    customers_df = pd.read_csv(CUSTOMERS_PATH)
+    products_df = pd.read_csv(PRODUCTS_PATH)
+    transactions_df = pd.read_csv(TRANSACTIONS_PATH)
+    return customers_df, products_df, transactions_df
 
-def verify_data_loading() -> None:
+
+def verify_data_loading(
+    customers_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+    transactions_df: pd.DataFrame,
+) -> None:
     print(" --- CUSTOMERS DATA --- ")
     print("\n")
     print(customers_df.head())
@@ -159,8 +177,231 @@ def transaction_analysis(transactions_df: pd.DataFrame):
     print(f"Customer ID: {top_customer_id}, Purchases: {top_customer_count}\n")
     
     
+def sample_csv(
+    path: str,
+    sample_size: int = 10_000,
+    stratify_by: str = None,
+    chunksize: int = 100_000,
+    seed: int = 42,
+) -> dict:
+    """
+    Single pass over a CSV that keeps a uniform reservoir sample of
+    sample_size rows (or sample_size rows per stratum when stratify_by is
+    given), the exact row count per stratum, and the real first/last 5 rows.
+    Each chunk gets random priorities and only the lowest ones are kept,
+    which is equivalent to classic reservoir sampling.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    strata_sizes = pd.Series(dtype="int64")
+    head = tail = None
+    columns = None
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if head is None:
+            head = chunk.head()
+            columns = list(chunk.columns)
+        tail = pd.concat([tail, chunk.tail()]).tail() if tail is not None else chunk.tail()
+
+        strata = (
+            chunk[stratify_by].fillna("<missing>").astype(str)
+            if stratify_by
+            else pd.Series(0, index=chunk.index)
+        )
+        strata_sizes = strata_sizes.add(strata.value_counts(), fill_value=0)
+
+        chunk = chunk.assign(_stratum=strata.to_numpy(), _priority=rng.random(len(chunk)))
+        candidates = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        reservoir = (
+            candidates.sort_values("_priority").groupby("_stratum").head(sample_size)
+        )
+
+    if reservoir is None:
+        raise ValueError(f"{path} has no rows to sample")
+
+    return {
+        "sample": reservoir.drop(columns="_priority").sort_index(),
+        "strata_sizes": strata_sizes.astype("int64"),
+        "population_rows": int(strata_sizes.sum()),
+        "columns": columns,
+        "head": head,
+        "tail": tail,
+    }
+
+
+def estimate_mean(values: pd.Series, sample_info: dict, z: float = 1.96):
+    """
+    Stratified estimate of the population mean of `values` (aligned with
+    sample_info["sample"]) and its confidence interval half-width.
+    Missing values are ignored, like pandas' mean.
+    """
+    strata = sample_info["sample"]["_stratum"]
+    strata_sizes = sample_info["strata_sizes"]
+
+    stats = (
+        pd.DataFrame({"x": values, "h": strata})
+        .dropna(subset=["x"])
+        .groupby("h")["x"]
+        .agg(["mean", "var", "count"])
+    )
+    if stats.empty:
+        return np.nan, np.nan
+
+    # Population rows with a value, per stratum
+    sampled_rows = strata.value_counts().reindex(stats.index)
+    stratum_rows = strata_sizes.reindex(stats.index) * stats["count"] / sampled_rows
+    weights = stratum_rows / stratum_rows.sum()
+
+    finite_population = (1 - stats["count"] / stratum_rows).clip(lower=0)
+    variance = (
+        weights**2 * stats["var"].fillna(0) / stats["count"] * finite_population
+    ).sum()
+
+    return float((weights * stats["mean"]).sum()), float(z * np.sqrt(variance))
+
+
+def estimate_count(mask: pd.Series, sample_info: dict, z: float = 1.96):
+    """
+    Estimated number of population rows where mask is True, with CI half-width.
+    """
+    share, margin = estimate_mean(mask.astype(float), sample_info, z)
+    population = sample_info["population_rows"]
+    return share * population, margin * population
+
+
+def _row_memory(column: pd.Series) -> pd.Series:
+    # Same accounting as memory_usage(deep=True): an 8 byte pointer plus the object
+    if column.dtype == object:
+        return column.map(sys.getsizeof) + 8
+    return pd.Series(
+        column.memory_usage(deep=True, index=False) / max(len(column), 1),
+        index=column.index,
+    )
+
+
+def sampled_data_basic_info(sample_info: dict, data_title: str) -> None:
+    sample = sample_info["sample"][sample_info["columns"]]
+
+    print(f" --- {data_title} DATA BASIC INFO (SAMPLED) --- ")
+    print("\n")
+    print(" --- FIRST 5 ROW --- ")
+    print(sample_info["head"])
+    print("\n")
+    print(" --- LAST 5 ROW --- ")
+    print(sample_info["tail"])
+    print("\n")
+    print(f" --- {data_title} DATA SHAPE --- ")
+    print(f" Number of Rows: {sample_info['population_rows']}")
+    print(f" Number of Columns: {len(sample_info['columns'])}")
+    print(f" Sampled Rows: {len(sample)}")
+    print("\n")
+    print(f" --- {data_title} DATA COLUMNS AND DATA TYPES (FROM SAMPLE) --- ")
+    print(sample.dtypes)
+    print("\n")
+    print(f" --- {data_title} DATA MEMORY USAGE (ESTIMATED, 95% CI) --- ")
+    total, total_margin = 0.0, 0.0
+    for col in sample.columns:
+        per_row, margin = estimate_mean(_row_memory(sample[col]), sample_info)
+        rows = sample_info["population_rows"]
+        total += per_row * rows
+        total_margin += margin * rows
+        print(f"{col}: {per_row * rows:,.0f} ± {margin * rows:,.0f}")
+    print(f"Total Memory: {total:,.0f} ± {total_margin:,.0f}")
+
+
+def sampled_data_statistical_summary(sample_info: dict, data_title: str) -> None:
+    sample = sample_info["sample"][sample_info["columns"]]
+
+    print(f"\n --- {data_title.upper()} DATA STATISTICAL ANALYSIS (SAMPLED) --- \n")
+    print(
+        f" Estimated from {len(sample)} of {sample_info['population_rows']} rows, "
+        "± is the 95% confidence interval\n"
+    )
+
+    print(" --- Numerical Columns Summary:\n")
+    num_rows = {}
+    for col in sample.select_dtypes(include="number").columns:
+        mean, mean_margin = estimate_mean(sample[col], sample_info)
+        missing, missing_margin = estimate_count(sample[col].isnull(), sample_info)
+        num_rows[col] = {
+            "mean": round(mean, 4),
+            "mean ±": round(mean_margin, 4),
+            "std (sample)": sample[col].std(),
+            "min (sample)": sample[col].min(),
+            "50% (sample)": sample[col].median(),
+            "max (sample)": sample[col].max(),
+            "missing": round(missing),
+            "missing ±": round(missing_margin),
+            "unique (sample)": sample[col].nunique(),
+        }
+    print(pd.DataFrame(num_rows).T.to_string())
+    print("\n")
+
+    print(" --- Categorical Columns Summary:\n")
+    cat_rows = {}
+    for col in sample.select_dtypes(exclude="number").columns:
+        top = sample[col].mode()
+        top = top.iloc[0] if not top.empty else None
+        top_count, top_margin = estimate_count(sample[col] == top, sample_info)
+        missing, missing_margin = estimate_count(sample[col].isnull(), sample_info)
+        cat_rows[col] = {
+            "top": top,
+            "freq": round(top_count),
+            "freq ±": round(top_margin),
+            "missing": round(missing),
+            "missing ±": round(missing_margin),
+            "unique (sample)": sample[col].nunique(),
+        }
+    print(pd.DataFrame(cat_rows).T.to_string())
+    print("\n")
+
+    print(" --- First 5 Rows:\n")
+    print(sample_info["head"].to_string())
+    print("\n --- Last 5 Rows:\n")
+    print(sample_info["tail"].to_string())
+
+
+def sampled_customer_analysis(sample_info: dict) -> None:
+    dataframe = sample_info["sample"].copy()
+
+    country_map = {"US": "United States", "USA": "United States"}
+    dataframe["country"] = dataframe["country"].replace(country_map)
+
+    dataframe["age"] = pd.to_numeric(
+        dataframe["age"].astype(str).str.extract(r"(\d+)")[0], errors="coerce"
+    )
+    valid_age = (dataframe["age"] > 0) & (dataframe["age"] < 150)
+
+    dataframe["registration_month"] = pd.to_datetime(
+        dataframe["registration_date"], errors="coerce"
+    ).dt.month
+
+    print("\n --- CUSTOMER ANALYSIS (SAMPLED, 95% CI) \n")
+    print("--- Customers per country ---")
+    for country in sorted(dataframe["country"].dropna().unique()):
+        count, margin = estimate_count(
+            valid_age & (dataframe["country"] == country), sample_info
+        )
+        print(f"{country}: {count:,.0f} ± {margin:,.0f}")
+
+    mean_age, mean_margin = estimate_mean(dataframe["age"].where(valid_age), sample_info)
+    print("\n--- Customers age distribution ---")
+    print(f"min (sample): {dataframe.loc[valid_age, 'age'].min()}")
+    print(f"max (sample): {dataframe.loc[valid_age, 'age'].max()}")
+    print(f"mean: {mean_age:.2f} ± {mean_margin:.2f}")
+    print(f"median (sample): {dataframe.loc[valid_age, 'age'].median()}")
+
+    print("\n--- Customer registration per month ---\n")
+    for month in sorted(dataframe["registration_month"].dropna().unique()):
+        count, margin = estimate_count(
+            valid_age & (dataframe["registration_month"] == month), sample_info
+        )
+        print(calendar.month_name[int(month)], ":", f"{count:,.0f} ± {margin:,.0f}")
+
+
 def main():
-    # verify_data_loading()
+    customers_df, products_df, transactions_df = load_data()
+    # verify_data_loading(customers_df, products_df, transactions_df)
     # data_basic_info(customers_df, 'CUSTOMERS')
     # data_basic_info(products_df, 'PRODUCTS')
     # data_basic_info(transactions_df, 'TRANSACTION')
@@ -173,7 +414,10 @@ def main():
     # customer_analysis(customers_df)
     # product_analysis(products_df)
     # transaction_analysis(transactions_df)
-    pass
+    # customers_sample = sample_csv("data/original/customers.csv", stratify_by="country")
+    # sampled_data_basic_info(customers_sample, 'CUSTOMERS')
+    # sampled_data_statistical_summary(customers_sample, 'CUSTOMERS')
+    # sampled_customer_analysis(customers_sample)
 
 
 if __name__ == "__main__":
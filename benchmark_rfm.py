@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from rfm_features import add_rfm_features
+
+
+def make_synthetic_transactions(
+    n_rows: int, n_customers: int, n_days: int = 730, seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    customer_ids = rng.integers(0, n_customers, n_rows)
+
+    return pd.DataFrame(
+        {
+            "customer_id": pd.Categorical.from_codes(
+                customer_ids, [f"C{i:08d}" for i in range(n_customers)]
+            ),
+            "transaction_date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit="D"),
+            "final_amount": rng.gamma(2.0, 150.0, n_rows).round(2),
+        }
+    )
+
+
+def benchmark_rfm(sizes=(1_000_000, 10_000_000, 20_000_000), n_customers=1_000_000):
+    print("--- RFM / ROLLING WINDOW FEATURES BENCHMARK ---")
+    for n_rows in sizes:
+        df = make_synthetic_transactions(n_rows, n_customers)
+
+        start = time.perf_counter()
+        add_rfm_features(df)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{n_rows:>12,} rows, {n_customers:,} customers: "
+            f"{elapsed:6.2f} s ({n_rows / elapsed:,.0f} rows/s)"
+        )
+
+
+def main():
+    benchmark_rfm()
+
+
+if __name__ == "__main__":
+    main()
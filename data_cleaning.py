@@ -1,5 +1,11 @@
 import pandas as pd
-from Project2_sandro_shubitidze import customers_df, products_df, transactions_df
+from Project2_sandro_shubitidze import (
+    CUSTOMERS_PATH,
+    PRODUCTS_PATH,
+    TRANSACTIONS_PATH,
+    load_data,
+)
+from memory_governor import governed_drop_duplicates
 import os
 
 
@@ -161,7 +167,7 @@ def check_transactions_data_quality(transactions_df: pd.DataFrame, customers_df:
 
     print("--- DATA QUALITY CHECK COMPLETE ---")
 
-def clean_customers(customers_df: pd.DataFrame):
+def clean_customers(customers_df: pd.DataFrame, governor=None):
 
     df = customers_df.copy()
     report = {
@@ -187,8 +193,9 @@ def clean_customers(customers_df: pd.DataFrame):
     report["dropped_missing_email"] = int(missing_before)
 
     # ----------  Remove duplicates ----------
-    dup_count = df.duplicated(keep="first").sum()
-    df = df.drop_duplicates(keep="first").copy()
+    rows_before = len(df)
+    df = governed_drop_duplicates(df, governor, "clean_customers: drop_duplicates").copy()
+    dup_count = rows_before - len(df)
     report["duplicate_rows_found"] = int(dup_count)
     report["duplicate_rows_removed"] = int(dup_count)
 
@@ -237,7 +244,7 @@ def clean_customers(customers_df: pd.DataFrame):
 
     return df.reset_index(drop=True), report
 
-def clean_products(products_df: pd.DataFrame):
+def clean_products(products_df: pd.DataFrame, governor=None):
 
     df = products_df.copy()
     report = {
@@ -263,9 +270,9 @@ def clean_products(products_df: pd.DataFrame):
     report["missing_price_filled"] = int(missing_before)
 
     # ---------- Remove duplicate rows ----------
-    dup_count = df.duplicated(keep="first").sum()
-    df = df.drop_duplicates(keep="first").copy()
-    report["duplicates_removed"] = int(dup_count)
+    rows_before = len(df)
+    df = governed_drop_duplicates(df, governor, "clean_products: drop_duplicates").copy()
+    report["duplicates_removed"] = int(rows_before - len(df))
 
     # ---------- Fix data types ----------
     df["stock"] = pd.to_numeric(df["stock"], errors="coerce").fillna(0).astype(int)
@@ -295,8 +302,12 @@ def clean_products(products_df: pd.DataFrame):
 
     return df.reset_index(drop=True), report
 
-def clean_transactions(transactions_df: pd.DataFrame):
-
+def clean_transactions(transactions_df: pd.DataFrame, governor=None, now=None):
+    """
+    Rows dated after `now` (default: the current time) are removed as future
+    dates. Pass `now` explicitly when the result is cached, so it is part of
+    the cache key.
+    """
     df = transactions_df.copy()
     report = {
         "initial_rows": len(df),
@@ -323,10 +334,17 @@ def clean_transactions(transactions_df: pd.DataFrame):
     report["missing_quantity_filled"] = int(missing_before)
 
     # ---------- Remove duplicates ----------
-    dup_count = df.duplicated(keep="first").sum()
-    df = df.drop_duplicates(keep="first").copy()
-    report["duplicates_removed"] = int(dup_count)
-
+    rows_before = len(df)
+    df = governed_drop_duplicates(
+        df, governor, "clean_transactions: drop_duplicates"
+    ).copy()
+    report["duplicates_removed"] = int(rows_before - len(df))
+
+    # ---------- Remove future dates ----------
+    now = pd.Timestamp.today() if now is None else pd.Timestamp(now)
+    future_mask = df["transaction_date"] > now
+    report["future_dates_removed"] = int(future_mask.sum())
+    df = df[~future_mask].copy()
 
     # ---------- Final report ----------
     report["final_rows"] = len(df)
@@ -352,8 +370,10 @@ def save_cleaned_df(df: pd.DataFrame, filename: str):
     df.to_csv(file_path, index=False)
     print(f"Saved cleaned data to {file_path}")
     
-def customer_report():
-    cleaned_customers_df, report = clean_customers(customers_df)
+def customer_report(governor=None):
+    cleaned_customers_df, report = clean_customers(
+        pd.read_csv(CUSTOMERS_PATH), governor
+    )
 
     customer_report = pd.DataFrame(
         {
@@ -392,9 +412,14 @@ def customer_report():
     print(dtypes_after)
     print("---------------------------------\n")
 
+    if governor is not None:
+        governor.report()
+
     save_cleaned_df(cleaned_customers_df, 'customers.csv')
-def product_report():
-    cleaned_products_df, report = clean_products(products_df)
+def product_report(governor=None):
+    cleaned_products_df, report = clean_products(
+        pd.read_csv(PRODUCTS_PATH), governor
+    )
 
     product_report_df = pd.DataFrame(
         {
@@ -433,9 +458,14 @@ def product_report():
     print(dtypes_after)
     print("---------------------------------\n")
 
+    if governor is not None:
+        governor.report()
+
     save_cleaned_df(cleaned_products_df, 'products_clean.csv')
-def transactions_report():
-    cleaned_transactions_df, report = clean_transactions(transactions_df)
+def transactions_report(governor=None):
+    cleaned_transactions_df, report = clean_transactions(
+        pd.read_csv(TRANSACTIONS_PATH), governor
+    )
 
     transactions_report_df = pd.DataFrame(
         {
@@ -472,16 +502,19 @@ def transactions_report():
     print(dtypes_after)
     print("---------------------------------\n")
 
+    if governor is not None:
+        governor.report()
+
     save_cleaned_df(cleaned_transactions_df, 'transactions_clean.csv')
 
 def main():
+    customers_df, products_df, transactions_df = load_data()
     # check_customers_data_quality(customers_df)
     # check_products_data_quality(products_df)
     # check_transactions_data_quality(transactions_df, customers_df)
     # customer_report()
     # product_report()
     # transactions_report()
-    pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+
+def build_date_dimension(dates) -> tuple:
+    """
+    Calendar table with one row per distinct day in `dates`.
+    Returns (codes, dimension): codes[i] is the dimension row of dates[i],
+    or -1 where the date is missing. date_key is the day number since
+    1970-01-01, so it can also be used to join other tables to the dimension.
+    Timezone-aware dates are grouped by their local calendar day, as .dt does.
+    """
+    timestamps = pd.to_datetime(pd.Series(dates), errors="coerce")
+    if timestamps.dt.tz is not None:
+        # datetime64[D] would otherwise cut the day in UTC
+        timestamps = timestamps.dt.tz_localize(None)
+    days = timestamps.to_numpy(dtype="datetime64[D]")
+    codes, unique_days = pd.factorize(days)
+    unique_dates = pd.DatetimeIndex(unique_days)
+
+    day_of_week = unique_dates.dayofweek
+    dimension = pd.DataFrame(
+        {
+            "date_key": unique_dates.to_numpy(dtype="datetime64[D]").astype(np.int64),
+            "date": unique_dates,
+            "year": unique_dates.year,
+            "month": unique_dates.month,
+            "period": unique_dates.to_period("M"),
+            "day_of_week": day_of_week,
+            "day_name": unique_dates.day_name(),
+            "is_weekend": day_of_week >= 5,
+        }
+    )
+
+    return codes, dimension
+
+
+def lookup_date_attributes(dates: pd.Series, attributes: list) -> pd.DataFrame:
+    """
+    Calendar attributes for every row of `dates`, computed once per distinct
+    date and attached by integer key. Missing dates get NA, except is_weekend
+    which is False, matching the .dt accessor results.
+    """
+    codes, dimension = build_date_dimension(dates)
+    missing = codes < 0
+
+    result = {}
+    for attribute in attributes:
+        values = dimension[attribute].array.take(codes, allow_fill=True)
+        if attribute == "is_weekend":
+            values = np.where(missing, False, values).astype(bool)
+        result[attribute] = values
+
+    return pd.DataFrame(result, index=dates.index)
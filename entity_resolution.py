@@ -0,0 +1,423 @@
+import numpy as np
+import pandas as pd
+
+
+# Weights of each agreeing field in a candidate pair's match score
+MATCH_WEIGHTS = {
+    "email": 0.4,
+    "email_local": 0.2,
+    "name": 0.3,
+    "country": 0.1,
+    "age": 0.1,
+    "registration_date": 0.1,
+}
+
+# Subtracted when two email local parts have the same letters but different
+# numbers ("emma.johnson1" / "emma.johnson55"): usually two people with the
+# same name, so name, country and age agreement alone must not merge them
+EMAIL_NUMBER_CONFLICT_PENALTY = 0.3
+
+# Name and email local part also score partially when their edit similarity
+# reaches this, so "jon smith" / "john smith" still count as agreeing
+NEAR_MATCH_SIMILARITY = 0.8
+
+COUNTRY_ALIASES = {
+    "us": "united states",
+    "usa": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+}
+
+
+def _normalize_customers(customers_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Comparison-ready copies of the fields used for blocking and scoring.
+    """
+    email = customers_df["email"].astype("string").str.strip().str.lower()
+    email = email.replace("", pd.NA)
+    parts = email.str.split("@", n=1, expand=True).reindex(columns=[0, 1])
+
+    name_tokens = (
+        customers_df["name"]
+        .astype("string")
+        .str.lower()
+        .str.replace(r"[^a-z\s]", " ", regex=True)
+        .str.split()
+    )
+
+    country = (
+        customers_df["country"]
+        .astype("string")
+        .str.lower()
+        .str.replace(".", "", regex=False)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+    age = pd.to_numeric(
+        customers_df["age"].astype("string").str.extract(r"(\d+)")[0], errors="coerce"
+    )
+    registration_date = pd.to_datetime(customers_df["registration_date"], errors="coerce")
+
+    return pd.DataFrame(
+        {
+            "customer_id": customers_df["customer_id"].to_numpy(),
+            "email": email.to_numpy(),
+            # scored as is: "emma.johnson1" and "emma.johnson55" are different people
+            "email_local": parts[0].to_numpy(),
+            # letters only, for blocking, so "emma.johnson1" and "Emma.Johnson" meet
+            "email_local_key": parts[0].str.replace(r"[^a-z]", "", regex=True).to_numpy(),
+            "email_domain": parts[1].to_numpy(),
+            "name": name_tokens.map(
+                lambda tokens: " ".join(sorted(tokens))
+                if isinstance(tokens, list) and tokens
+                else pd.NA
+            ).to_numpy(),
+            "name_tokens": name_tokens.to_numpy(),
+            "country": country.replace(COUNTRY_ALIASES).to_numpy(),
+            "age": age.to_numpy(dtype=float),
+            "registration_date": registration_date.to_numpy(),
+            # estimated, to split blocks that are too large to compare in full
+            "birth_year": (registration_date.dt.year - age).to_numpy(dtype=float),
+        }
+    )
+
+
+def _blocking_keys(normalized: pd.DataFrame) -> pd.DataFrame:
+    """
+    One (row, key) pair per blocking key of every customer. Keys are prefixed
+    by type so different key types never share a block.
+    """
+    rows = np.arange(len(normalized))
+
+    tokens = pd.DataFrame(
+        {"row": rows, "token": normalized["name_tokens"].to_numpy()}
+    ).explode("token")
+    tokens = tokens[tokens["token"].notna()]
+    domains = normalized["email_domain"].to_numpy()[tokens["row"].to_numpy()]
+
+    keys = [
+        pd.DataFrame({"row": rows, "key": "local:" + normalized["email_local_key"]}),
+        pd.DataFrame({"row": rows, "key": "name:" + normalized["name"]}),
+        # a domain on its own is shared by millions, so pair it with a name token
+        pd.DataFrame(
+            {
+                "row": tokens["row"].to_numpy(),
+                "key": "domain:" + pd.Series(domains, dtype="string") + ":"
+                + tokens["token"].astype("string").to_numpy(),
+            }
+        ),
+    ]
+    keys = pd.concat(keys, ignore_index=True)
+
+    return keys[keys["key"].notna() & (keys["key"] != "local:")]
+
+
+def candidate_pairs(normalized: pd.DataFrame, max_block_size: int = 50):
+    """
+    Pairs of rows sharing at least one blocking key, plus a report of the
+    blocks that were too large. A block larger than max_block_size is split
+    by estimated birth year so a very common key cannot make the pair count
+    quadratic; sub-blocks that are still too large, and rows without a birth
+    year in an oversized block, are skipped and counted.
+    Returns (pairs, block_report).
+    """
+    keys = _blocking_keys(normalized).drop_duplicates()
+
+    block_sizes = keys["key"].map(keys["key"].value_counts())
+    oversized = keys[block_sizes > max_block_size]
+    birth_year = pd.Series(
+        normalized["birth_year"].to_numpy()[oversized["row"].to_numpy()],
+        index=oversized.index,
+    )
+    sub_blocks = oversized[birth_year.notna()].assign(
+        key=oversized["key"]
+        + ":born:"
+        + birth_year.dropna().astype(int).astype(str).astype("string")
+    )
+    keys = pd.concat([keys[block_sizes <= max_block_size], sub_blocks])
+
+    block_sizes = keys["key"].map(keys["key"].value_counts())
+    too_large = keys[block_sizes > max_block_size]
+    skipped_rows = pd.concat(
+        [too_large["row"], oversized.loc[birth_year.isna(), "row"]]
+    ).nunique()
+    block_report = {
+        "oversized_blocks": int(oversized["key"].nunique()),
+        "sub_blocks": int(sub_blocks["key"].nunique()),
+        "skipped_blocks": int(too_large["key"].nunique()),
+        "rows_in_skipped_blocks": int(skipped_rows),
+    }
+    keys = keys[(block_sizes >= 2) & (block_sizes <= max_block_size)]
+
+    pairs = keys.merge(keys, on="key", suffixes=("_left", "_right"))
+    pairs = pairs[pairs["row_left"] < pairs["row_right"]]
+
+    pairs = (
+        pairs[["row_left", "row_right"]]
+        .drop_duplicates()
+        .to_numpy(dtype=np.int64)
+        .reshape(-1, 2)
+    )
+    return pairs, block_report
+
+
+def edit_similarity(
+    left: np.ndarray,
+    right: np.ndarray,
+    max_length: int = 32,
+    min_similarity: float = 0.0,
+    batch_size: int = 100_000,
+):
+    """
+    1 - Levenshtein distance / length of the longer string, for every
+    (left[i], right[i]) pair. The dynamic program runs over character
+    positions, vectorized across the pairs of one batch of batch_size, so
+    memory stays bounded however many pairs there are; strings are cut to
+    max_length characters. Missing or empty strings have similarity 0, and
+    so do pairs whose length difference alone puts them below min_similarity,
+    without running the dynamic program.
+    """
+    left = pd.Series(left, dtype="string").fillna("").str.slice(0, max_length)
+    right = pd.Series(right, dtype="string").fillna("").str.slice(0, max_length)
+    similarity = np.zeros(len(left))
+
+    left_len = left.str.len().to_numpy()
+    right_len = right.str.len().to_numpy()
+    longest = np.maximum(left_len, right_len)
+    # the distance is at least the length difference
+    reachable = (left_len > 0) & (right_len > 0) & (
+        1 - np.abs(left_len - right_len) / np.maximum(longest, 1) >= min_similarity
+    )
+    candidates = np.flatnonzero(reachable)
+
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start : start + batch_size]
+        similarity[batch] = _edit_similarity_batch(
+            left.iloc[batch], right.iloc[batch], max_length
+        )
+    return similarity
+
+
+def _edit_similarity_batch(left: pd.Series, right: pd.Series, max_length: int):
+    n = len(left)
+    similarity = np.zeros(n)
+    if n == 0:
+        return similarity
+
+    left_chars = left.to_numpy(dtype=f"U{max_length}")
+    right_chars = right.to_numpy(dtype=f"U{max_length}")
+    left_len = np.char.str_len(left_chars)
+    right_len = np.char.str_len(right_chars)
+    width = int(max(left_len.max(), right_len.max()))
+    if width == 0:
+        return similarity
+
+    # unicode arrays viewed as one code point per column, 0 past the end
+    left_codes = left_chars.astype(f"U{width}").view(np.uint32).reshape(n, width)
+    right_codes = right_chars.astype(f"U{width}").view(np.uint32).reshape(n, width)
+
+    rows = np.arange(n)
+    previous = np.tile(np.arange(width + 1, dtype=np.int32), (n, 1))
+    distance = np.where(left_len == 0, right_len, 0)
+    for i in range(1, width + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        substitution = previous[:, :-1] + (
+            left_codes[:, i - 1, None] != right_codes
+        )
+        deletion = previous[:, 1:] + 1
+        best = np.minimum(substitution, deletion)
+        for j in range(1, width + 1):
+            current[:, j] = np.minimum(best[:, j - 1], current[:, j - 1] + 1)
+        done = left_len == i
+        distance[done] = current[rows[done], right_len[done]]
+        previous = current
+
+    longest = np.maximum(left_len, right_len)
+    present = (left_len > 0) & (right_len > 0)
+    similarity[present] = 1 - distance[present] / longest[present]
+    return similarity
+
+
+def score_pairs(normalized: pd.DataFrame, pairs: np.ndarray) -> np.ndarray:
+    """
+    Weighted agreement score of every candidate pair, computed column-wise.
+    Name and email local part earn their weight times their edit similarity
+    when it reaches NEAR_MATCH_SIMILARITY; the other fields must agree exactly.
+    """
+    left, right = pairs[:, 0], pairs[:, 1]
+    scores = np.zeros(len(pairs))
+
+    for field in ["email", "country"]:
+        values = normalized[field].astype("string").fillna("").to_numpy(dtype=object)
+        agree = (values[left] != "") & (values[left] == values[right])
+        scores += MATCH_WEIGHTS[field] * agree.astype(bool)
+
+    # numbers in an email local part tell accounts apart, so near matches
+    # of local parts need the same digits: "jon.smith7" / "john.smith7"
+    local = normalized["email_local"].astype("string").fillna("")
+    local_digits = local.str.replace(r"\D", "", regex=True).to_numpy(dtype=object)
+    same_digits = local_digits[left] == local_digits[right]
+    local_key = (
+        normalized["email_local_key"].astype("string").fillna("").to_numpy(dtype=object)
+    )
+    number_conflict = (
+        (local_key[left] != "") & (local_key[left] == local_key[right]) & ~same_digits
+    )
+    scores -= EMAIL_NUMBER_CONFLICT_PENALTY * number_conflict
+
+    for field, allowed in [("email_local", same_digits), ("name", None)]:
+        values = normalized[field].astype("string").fillna("").to_numpy(dtype=object)
+        similarity = (values[left] != "") & (values[left] == values[right])
+        similarity = similarity.astype(float)
+        # edit distance only where the values differ
+        differ = similarity < 1
+        if allowed is not None:
+            differ &= allowed
+        differ = np.flatnonzero(differ)
+        similarity[differ] = edit_similarity(
+            values[left[differ]],
+            values[right[differ]],
+            min_similarity=NEAR_MATCH_SIMILARITY,
+        )
+        similarity[similarity < NEAR_MATCH_SIMILARITY] = 0
+        scores += MATCH_WEIGHTS[field] * similarity
+
+    age = normalized["age"].to_numpy()
+    scores += MATCH_WEIGHTS["age"] * (np.abs(age[left] - age[right]) <= 1)
+
+    registration = normalized["registration_date"].to_numpy()
+    scores += MATCH_WEIGHTS["registration_date"] * (
+        registration[left] == registration[right]
+    )
+
+    return scores
+
+
+def _connected_components(n_rows: int, pairs: np.ndarray) -> np.ndarray:
+    """
+    Component label of every row, by min-label propagation over the pairs.
+    """
+    labels = np.arange(n_rows)
+    if len(pairs) == 0:
+        return labels
+
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        smallest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smallest)
+        np.minimum.at(updated, right, smallest)
+        # pointer jumping: follow labels to their own label
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def resolve_customers(
+    customers_df: pd.DataFrame, threshold: float = 0.6, max_block_size: int = 50
+):
+    """
+    Group customer rows that describe the same person and give every group a
+    stable cluster_id: the smallest customer_id among its members. Rows with
+    the same customer_id always end up in the same cluster.
+    """
+    df = customers_df.reset_index(drop=True).copy()
+    report = {
+        "initial_rows": len(df),
+        "candidate_pairs": 0,
+        "matched_pairs": 0,
+        "clusters": 0,
+        "customer_ids_merged": 0,
+    }
+
+    normalized = _normalize_customers(df)
+
+    pairs, block_report = candidate_pairs(normalized, max_block_size=max_block_size)
+    report.update(block_report)
+    scores = score_pairs(normalized, pairs)
+    matched = pairs[scores >= threshold]
+    report["candidate_pairs"] = len(pairs)
+    report["matched_pairs"] = len(matched)
+
+    # Sorted codes, so the smallest code in a cluster is its smallest id.
+    # Missing ids get code -1 and are never linked by id alone.
+    id_codes, id_values = pd.factorize(df["customer_id"], sort=True)
+    rows = np.arange(len(df))
+    has_id = id_codes >= 0
+
+    # Link rows sharing a customer_id to that id's first row
+    first_row = np.full(len(id_values), len(df))
+    np.minimum.at(first_row, id_codes[has_id], rows[has_id])
+    same_id = np.column_stack((first_row[id_codes[has_id]], rows[has_id]))
+    links = np.concatenate((matched, same_id[same_id[:, 0] != same_id[:, 1]]))
+
+    components = _connected_components(len(df), links)
+    cluster_code = np.full(len(df), len(id_values))
+    np.minimum.at(cluster_code, components[has_id], id_codes[has_id])
+    cluster_code = cluster_code[components]
+    # clusters made only of rows without an id keep a missing cluster_id
+    cluster_code[cluster_code == len(id_values)] = -1
+    df["cluster_id"] = pd.Index(id_values).array.take(cluster_code, allow_fill=True)
+
+    report["clusters"] = int(df["cluster_id"].nunique())
+    report["customer_ids_merged"] = int(
+        df["customer_id"].nunique() - report["clusters"]
+    )
+
+    print("--- CUSTOMER ENTITY RESOLUTION REPORT ---")
+    print(f"Customer rows: {report['initial_rows']}")
+    print(
+        f"Blocks over {max_block_size} rows: {report['oversized_blocks']} "
+        f"(split into {report['sub_blocks']} by birth year)"
+    )
+    print(
+        f"Blocks skipped as still too large: {report['skipped_blocks']} "
+        f"({report['rows_in_skipped_blocks']} rows)"
+    )
+    print(f"Candidate pairs scored: {report['candidate_pairs']}")
+    print(f"Pairs matched: {report['matched_pairs']}")
+    print(f"Customer IDs merged into another cluster: {report['customer_ids_merged']}")
+    print(f"Resolved customers: {report['clusters']}")
+    print("------------------------------------------\n")
+
+    return df, report
+
+
+def canonical_customers(resolved_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per cluster, keyed by cluster_id, for joining re-keyed transactions.
+    Rows without an id that matched no other row have no cluster_id and no
+    transactions can refer to them, so they are left out.
+    """
+    resolved_df = resolved_df[resolved_df["cluster_id"].notna()]
+    is_canonical = (resolved_df["customer_id"] == resolved_df["cluster_id"]).fillna(
+        False
+    )
+    canonical = pd.concat([resolved_df[is_canonical], resolved_df[~is_canonical]])
+    canonical = canonical.drop_duplicates("cluster_id").copy()
+    canonical["customer_id"] = canonical["cluster_id"]
+
+    return canonical.drop(columns="cluster_id").reset_index(drop=True)
+
+
+def rekey_transactions(
+    transactions_df: pd.DataFrame, resolved_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Replace customer_id with its cluster_id; unknown ids are left as they are.
+    The original id is kept in source_customer_id.
+    """
+    df = transactions_df.copy()
+    id_map = resolved_df.drop_duplicates("customer_id").set_index("customer_id")[
+        "cluster_id"
+    ]
+
+    df["source_customer_id"] = df["customer_id"]
+    known = df["customer_id"].isin(id_map.index) & df["customer_id"].notna()
+    df.loc[known, "customer_id"] = df.loc[known, "customer_id"].map(id_map)
+
+    return df
@@ -0,0 +1,417 @@
+import copy
+import operator
+from datetime import date, datetime
+
+import pandas as pd
+
+from rfm_features import add_rfm_features
+from transformations import (
+    add_categorical_features,
+    add_financial_features,
+    add_temporal_features,
+)
+
+
+# Columns each feature step reads and writes. per_customer steps compute
+# values over all of a customer's rows, so only filters that keep or drop
+# whole customers may be pushed below them.
+FEATURE_STEPS = {
+    "financial": {
+        "func": add_financial_features,
+        "inputs": ["price", "quantity"],
+        "outputs": ["total_amount", "discount", "final_amount"],
+        "per_customer": False,
+    },
+    "temporal": {
+        "func": add_temporal_features,
+        "inputs": ["transaction_date", "registration_date", "age"],
+        "outputs": [
+            "transaction_month",
+            "transaction_day_of_week",
+            "customer_age_at_purchase",
+        ],
+        "per_customer": False,
+    },
+    "categorical": {
+        "func": add_categorical_features,
+        "inputs": ["customer_id", "final_amount", "age", "transaction_date"],
+        "outputs": ["customer_segment", "age_group", "is_weekend"],
+        "per_customer": True,
+    },
+    "rfm": {
+        "func": add_rfm_features,
+        "inputs": ["customer_id", "transaction_date", "final_amount"],
+        "outputs": [
+            "recency_days",
+            "frequency",
+            "monetary",
+            "spend_7d",
+            "purchases_7d",
+            "spend_30d",
+            "purchases_30d",
+            "spend_90d",
+            "purchases_90d",
+        ],
+        "per_customer": True,
+    },
+}
+
+# Parsed at scan time, since feature steps use the .dt accessor on them
+DATE_COLUMNS = ["transaction_date", "registration_date"]
+
+# Filters that are False for a missing value. Only these may move into the
+# right side of a left join: rows the join would fill with NaN fail them
+# anyway, so the join can become an inner join. "!=" keeps NaN rows.
+NULL_REJECTING_OPS = {"==", "<", "<=", ">", ">=", "in", "between"}
+
+FILTER_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda values, options: values.isin(options),
+    "between": lambda values, bounds: values.between(*bounds),
+}
+
+
+def _is_datetime_value(value) -> bool:
+    if isinstance(value, (list, tuple)):
+        return any(_is_datetime_value(item) for item in value)
+    return isinstance(value, (pd.Timestamp, datetime, date))
+
+
+def _apply_filter(dataframe: pd.DataFrame, column: str, op: str, value):
+    values = dataframe[column]
+    if _is_datetime_value(value):
+        values = pd.to_datetime(values, errors="coerce")
+    return dataframe[FILTER_OPS[op](values, value)]
+
+
+def _rejects_nulls(step) -> bool:
+    if step["op"] not in NULL_REJECTING_OPS:
+        return False
+    if step["op"] == "in":
+        return not any(pd.isna(option) for option in step["value"])
+    return True
+
+
+def _source_columns(source) -> list:
+    if isinstance(source, pd.DataFrame):
+        return list(source.columns)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+class Plan:
+    """
+    Lazily recorded pipeline: a scan of a CSV path or DataFrame, followed by
+    filter, join, feature and aggregate steps. Nothing runs until collect(),
+    which first optimizes the plan:
+    - filters are pushed down as far as they stay correct, into the scans
+      (including the right side of joins) where possible;
+    - only the columns the requested output needs are read and joined, and
+      feature steps whose outputs are unused are skipped.
+    """
+
+    def __init__(self, source, chunksize: int = 100_000):
+        self.source = source
+        self.chunksize = chunksize
+        self.scan_filters = []
+        self.steps = []
+        self.aggregation = None
+
+    def _extend(self, step) -> "Plan":
+        if self.aggregation is not None:
+            raise ValueError("No steps can follow an aggregate")
+        plan = copy.copy(self)
+        plan.steps = self.steps + [step]
+        return plan
+
+    def filter(self, column: str, op: str, value) -> "Plan":
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter operator: {op}")
+        return self._extend({"kind": "filter", "column": column, "op": op, "value": value})
+
+    def join(self, other: "Plan", on: str, how: str = "left") -> "Plan":
+        if other.steps and any(step["kind"] != "filter" for step in other.steps):
+            raise ValueError("The right side of a join may only scan and filter")
+        return self._extend({"kind": "join", "right": other, "on": on, "how": how})
+
+    def with_features(self, *names) -> "Plan":
+        plan = self
+        for name in names:
+            if name not in FEATURE_STEPS:
+                raise ValueError(f"Unknown feature step: {name}")
+            plan = plan._extend({"kind": "feature", "name": name})
+        return plan
+
+    def aggregate(self, by, column: str, func) -> "Plan":
+        if self.aggregation is not None:
+            raise ValueError("Plan already ends in an aggregate")
+        plan = copy.copy(self)
+        plan.aggregation = {
+            "by": [by] if isinstance(by, str) else list(by),
+            "column": column,
+            "func": func,
+        }
+        return plan
+
+    # ---------- Optimization ----------
+
+    def _pushdown(self, steps):
+        """
+        Place every filter as early as possible. Returns (root scan filters,
+        steps) where join steps carry their own right-side scan filters.
+        """
+        root_filters = list(self.scan_filters)
+        placed = []
+        # column -> join step whose right side brings it in
+        column_origin = {}
+        root_columns = set(_source_columns(self.source))
+
+        for step in steps:
+            if step["kind"] == "join":
+                step = dict(step, right_filters=list(step["right"].steps))
+                for column in _source_columns(step["right"].source):
+                    if column != step["on"] and column not in root_columns:
+                        column_origin.setdefault(column, step)
+                placed.append(step)
+                continue
+            if step["kind"] != "filter":
+                placed.append(step)
+                continue
+
+            column = step["column"]
+            # per-customer if it is the customer key or comes from a join on it
+            origin = column_origin.get(column)
+            per_customer_column = column == "customer_id" or (
+                origin is not None and origin["on"] == "customer_id"
+            )
+
+            position = len(placed)
+            while position > 0:
+                previous = placed[position - 1]
+                if previous["kind"] == "join" and previous is origin:
+                    if previous["how"] == "inner":
+                        previous["right_filters"].append(step)
+                    elif previous["how"] == "left" and _rejects_nulls(step):
+                        # unmatched rows would fail the filter anyway, so it
+                        # can run in the right scan and the join turn inner
+                        previous["right_filters"].append(step)
+                        previous["how"] = "inner"
+                    else:
+                        placed.insert(position, step)
+                    break
+                if previous["kind"] == "feature":
+                    feature = FEATURE_STEPS[previous["name"]]
+                    if column in feature["outputs"] or (
+                        feature["per_customer"] and not per_customer_column
+                    ):
+                        placed.insert(position, step)
+                        break
+                position -= 1
+            else:
+                root_filters.append(step)
+
+        return root_filters, placed
+
+    def _prune(self, steps, columns):
+        """
+        Walk the steps backwards collecting the columns each one needs.
+        Returns (root columns to read, steps without unused features); join
+        steps get the right-side columns to read as right_columns.
+        """
+        if self.aggregation is not None:
+            required = set(self.aggregation["by"]) | {self.aggregation["column"]}
+        else:
+            required = set(columns) if columns is not None else None
+
+        kept = []
+        for step in reversed(steps):
+            if step["kind"] == "feature":
+                feature = FEATURE_STEPS[step["name"]]
+                if required is not None:
+                    if not required & set(feature["outputs"]):
+                        continue
+                    required = (required - set(feature["outputs"])) | set(
+                        feature["inputs"]
+                    )
+            elif step["kind"] == "filter":
+                if required is not None:
+                    required.add(step["column"])
+            elif step["kind"] == "join":
+                right_columns = _source_columns(step["right"].source)
+                right_filters = step.get("right_filters", step["right"].steps)
+                filter_columns = {f["column"] for f in right_filters}
+                if required is None:
+                    step = dict(step, right_columns=None)
+                else:
+                    needed = (required & set(right_columns)) | filter_columns
+                    step = dict(
+                        step,
+                        right_columns=[
+                            c for c in right_columns if c in needed or c == step["on"]
+                        ],
+                    )
+                    required = (required - set(right_columns)) | {step["on"]}
+            kept.append(step)
+
+        if required is None:
+            return None, list(reversed(kept))
+
+        root_columns = _source_columns(self.source)
+        return [c for c in root_columns if c in required], list(reversed(kept))
+
+    def optimize(self, columns=None):
+        # Unused features are dropped first: a per-customer feature that is
+        # not needed must not keep filters from reaching the scans
+        _, steps = self._prune(self.steps, columns)
+        root_filters, steps = self._pushdown(steps)
+        root_columns, steps = self._prune(steps, columns)
+        if root_columns is not None:
+            filter_columns = {f["column"] for f in root_filters}
+            root_columns = [
+                c
+                for c in _source_columns(self.source)
+                if c in root_columns or c in filter_columns
+            ]
+        return {"root_columns": root_columns, "root_filters": root_filters, "steps": steps}
+
+    def explain(self, columns=None) -> str:
+        optimized = self.optimize(columns)
+
+        def describe_filters(filters):
+            return ", ".join(f"{f['column']} {f['op']} {f['value']!r}" for f in filters)
+
+        lines = [
+            f"scan {self._describe_source(self.source)} "
+            f"columns={optimized['root_columns'] or 'all'} "
+            f"filters=[{describe_filters(optimized['root_filters'])}]"
+        ]
+        for step in optimized["steps"]:
+            if step["kind"] == "join":
+                lines.append(
+                    f"{step['how']} join {self._describe_source(step['right'].source)} "
+                    f"on {step['on']} columns={step['right_columns'] or 'all'} "
+                    f"filters=[{describe_filters(step['right_filters'])}]"
+                )
+            elif step["kind"] == "filter":
+                lines.append(f"filter {describe_filters([step])}")
+            else:
+                lines.append(f"feature {step['name']}")
+        if self.aggregation is not None:
+            agg = self.aggregation
+            lines.append(f"aggregate {agg['column']} by {agg['by']} with {agg['func']}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _describe_source(source) -> str:
+        return "<DataFrame>" if isinstance(source, pd.DataFrame) else str(source)
+
+    # ---------- Execution ----------
+
+    def _scan(self, source, columns, filters) -> pd.DataFrame:
+        if isinstance(source, pd.DataFrame):
+            chunks = [source if columns is None else source[columns]]
+        else:
+            chunks = pd.read_csv(source, usecols=columns, chunksize=self.chunksize)
+
+        scanned = []
+        for chunk in chunks:
+            for f in filters:
+                chunk = _apply_filter(chunk, f["column"], f["op"], f["value"])
+            chunk = chunk.copy()
+            for col in DATE_COLUMNS:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+            scanned.append(chunk)
+        return pd.concat(scanned, ignore_index=True)
+
+    def collect(self, columns=None):
+        """
+        Run the optimized plan. Returns the aggregate result if the plan ends
+        in aggregate(), otherwise a DataFrame with `columns` (all by default).
+        """
+        optimized = self.optimize(columns)
+        dataframe = self._scan(
+            self.source, optimized["root_columns"], optimized["root_filters"]
+        )
+
+        for step in optimized["steps"]:
+            if step["kind"] == "join":
+                right = self._scan(
+                    step["right"].source, step["right_columns"], step["right_filters"]
+                )
+                dataframe = dataframe.merge(right, on=step["on"], how=step["how"])
+            elif step["kind"] == "filter":
+                dataframe = _apply_filter(
+                    dataframe, step["column"], step["op"], step["value"]
+                )
+            else:
+                dataframe = FEATURE_STEPS[step["name"]]["func"](dataframe)
+
+        if self.aggregation is not None:
+            agg = self.aggregation
+            return dataframe.groupby(agg["by"])[agg["column"]].agg(agg["func"])
+
+        return dataframe if columns is None else dataframe[columns]
+
+
+def scan(source, chunksize: int = 100_000) -> Plan:
+    return Plan(source, chunksize=chunksize)
+
+
+def transaction_view_plan(customers_source, products_source, transactions_source) -> Plan:
+    """
+    Lazy equivalent of create_transaction_view followed by all add_*_features.
+    Sources may be CSV paths or DataFrames. The add_*_features functions
+    are this plan's step implementations.
+    """
+    return (
+        scan(transactions_source)
+        .join(scan(customers_source), on="customer_id")
+        .join(scan(products_source), on="product_id")
+        .with_features("financial", "temporal", "categorical", "rfm")
+    )
+
+
+def collect_transaction_view(
+    customers_source, products_source, transactions_source, columns: list
+) -> pd.DataFrame:
+    """
+    Only `columns` of the transaction view, reading, joining and computing
+    just what they need. A plain function of its sources, so StageCache can
+    key it by them.
+    """
+    return transaction_view_plan(
+        customers_source, products_source, transactions_source
+    ).collect(columns)
+
+
+def weekend_pattern(plan: Plan) -> pd.DataFrame:
+    """
+    Weekend vs weekday count/sum/mean of final_amount, as in
+    revenue_and_customer_analysis, reading only the columns it needs.
+    """
+    pattern = plan.aggregate("is_weekend", "final_amount", ["count", "sum", "mean"]).collect()
+    pattern.index = pattern.index.map({True: "Weekend", False: "Weekday"})
+    return pattern
+
+
+def revenue_by_category(plan: Plan) -> pd.Series:
+    return (
+        plan.aggregate("category", "final_amount", "sum")
+        .collect()
+        .sort_values(ascending=False)
+    )
+
+
+def revenue_by_country(plan: Plan, top: int = 5) -> pd.Series:
+    return (
+        plan.aggregate("country", "final_amount", "sum")
+        .collect()
+        .sort_values(ascending=False)
+        .head(top)
+    )
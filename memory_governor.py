@@ -0,0 +1,193 @@
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# Peak memory of a stage as a multiple of its input size
+STAGE_MEMORY_FACTORS = {
+    "drop_duplicates": 2.5,  # row hashes + hash table + deduplicated copy
+    "join": 3.0,  # intermediate merge, final merge and indicator columns
+    "features": 2.0,  # new feature columns next to the merged frame
+    "group_aggregate": 1.5,  # group codes + partial results
+}
+
+
+def estimate_frame_bytes(dataframe: pd.DataFrame, sample_rows: int = 1000) -> int:
+    """
+    Deep memory of a frame without walking every string: fixed-width
+    columns are counted exactly, object columns are extrapolated from a sample.
+    """
+    n_rows = len(dataframe)
+    if n_rows == 0:
+        return 0
+
+    sample = dataframe.sample(min(n_rows, sample_rows), random_state=0)
+    total = 0
+    for col in dataframe.columns:
+        if dataframe[col].dtype == object:
+            sampled = sample[col].memory_usage(deep=True, index=False)
+            total += sampled / len(sample) * n_rows
+        else:
+            total += dataframe[col].memory_usage(deep=False, index=False)
+
+    return int(total)
+
+
+def estimate_csv_bytes(path: str, sample_rows: int = 1000):
+    """
+    Estimated (in-memory bytes, rows) of a CSV once loaded, from the file
+    size and the schema of its first sample_rows rows.
+    """
+    sample = pd.read_csv(path, nrows=sample_rows)
+    if sample.empty:
+        return 0, 0
+
+    sample_text_bytes = len(sample.to_csv(index=False, header=False).encode())
+    rows = max(1, int(os.path.getsize(path) / (sample_text_bytes / len(sample))))
+    bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+
+    return int(bytes_per_row * rows), rows
+
+
+class MemoryGovernor:
+    """
+    Decides per stage whether it runs in memory or in chunks, given a
+    memory budget in bytes, and keeps a record of every decision.
+    Chunked stages spill intermediate partitions to spill_dir.
+    """
+
+    def __init__(self, memory_budget: int, spill_dir: str = None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="pipeline_spill_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.plans = []
+        self._spill_count = 0
+
+    def plan(
+        self, stage: str, estimated_bytes: int, spills: bool = True, partitions: int = None
+    ) -> int:
+        """
+        Number of partitions the stage should run in; 1 means in memory.
+        A stage that runs on another stage's partitions passes their count
+        as `partitions`, so the recorded plan is the one that actually ran.
+        """
+        n_partitions = partitions or max(1, math.ceil(estimated_bytes / self.memory_budget))
+        if n_partitions == 1:
+            plan = "in-memory"
+        else:
+            plan = "chunked + spill" if spills else "chunked"
+        self.plans.append(
+            {
+                "stage": stage,
+                "estimated_bytes": int(estimated_bytes),
+                "memory_budget": self.memory_budget,
+                "plan": plan,
+                "partitions": n_partitions,
+                "spills": spills,
+            }
+        )
+        return n_partitions
+
+    def replan(self, plans: list):
+        """
+        Record the plans of a stage whose result came from a cache instead of
+        running: each is planned again against this budget and marked cached.
+        """
+        for plan in plans:
+            self.plan(plan["stage"], plan["estimated_bytes"], plan.get("spills", True))
+            self.plans[-1]["plan"] += " (cached, not run)"
+
+    def spill(self, dataframe: pd.DataFrame, name: str) -> str:
+        self._spill_count += 1
+        path = os.path.join(self.spill_dir, f"{self._spill_count:06d}_{name}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(dataframe, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    def load(self, path: str) -> pd.DataFrame:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def report(self) -> pd.DataFrame:
+        plans = pd.DataFrame(
+            self.plans,
+            columns=["stage", "estimated_bytes", "memory_budget", "plan", "partitions"],
+        )
+
+        print("\n--- MEMORY GOVERNOR EXECUTION PLAN ---")
+        print(plans.to_string(index=False))
+        print("---------------------------------------\n")
+
+        return plans
+
+    def cleanup(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def cache_key(self) -> bytes:
+        """
+        Governed stages return the same result under any budget, so a stage
+        cache keys them without the budget or the plans made so far.
+        """
+        return b"MemoryGovernor"
+
+
+def governed_drop_duplicates(
+    dataframe: pd.DataFrame, governor: MemoryGovernor = None, stage: str = "drop_duplicates"
+) -> pd.DataFrame:
+    """
+    Same result as dataframe.drop_duplicates(keep="first"). Over budget, rows
+    are split by a hash of the whole row, so identical rows share a partition,
+    and each partition is deduplicated on its own. The input is already in
+    memory, so partitions are cut from it one at a time instead of spilled.
+    """
+    if governor is None:
+        return dataframe.drop_duplicates(keep="first")
+
+    estimated = estimate_frame_bytes(dataframe) * STAGE_MEMORY_FACTORS["drop_duplicates"]
+    n_partitions = governor.plan(stage, estimated, spills=False)
+    if n_partitions == 1:
+        return dataframe.drop_duplicates(keep="first")
+
+    row_hashes = pd.util.hash_pandas_object(dataframe, index=False).to_numpy()
+    partition_ids = row_hashes % n_partitions
+    positions = np.arange(len(dataframe))
+    keep = np.zeros(len(dataframe), dtype=bool)
+
+    for i in range(n_partitions):
+        in_partition = positions[partition_ids == i]
+        # partitions keep row order, so "first" inside one is first overall
+        part = dataframe.iloc[in_partition]
+        keep[in_partition[~part.duplicated(keep="first").to_numpy()]] = True
+
+    return dataframe[keep]
+
+
+def spill_hash_partitions(
+    path: str,
+    key: str,
+    n_partitions: int,
+    governor: MemoryGovernor,
+    chunksize: int = 100_000,
+    **read_csv_kwargs,
+):
+    """
+    Stream a CSV in chunks and spill every chunk's rows to n_partitions
+    groups of files by hash of `key`. Returns one list of spill files per
+    partition; no more than one chunk is held in memory at a time.
+    """
+    partitions = [[] for _ in range(n_partitions)]
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        hashes = pd.util.hash_pandas_object(chunk[key].astype(str), index=False)
+        partition_ids = hashes.to_numpy() % n_partitions
+        for i in range(n_partitions):
+            piece = chunk[partition_ids == i]
+            if len(piece):
+                partitions[i].append(governor.spill(piece, f"{key}_p{i}"))
+
+    return partitions
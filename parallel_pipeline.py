@@ -0,0 +1,400 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from date_dimension import lookup_date_attributes
+from memory_governor import (
+    STAGE_MEMORY_FACTORS,
+    MemoryGovernor,
+    estimate_csv_bytes,
+    estimate_frame_bytes,
+    spill_hash_partitions,
+)
+from rfm_features import add_rfm_features
+from transformations import (
+    add_categorical_features,
+    add_financial_features,
+    add_temporal_features,
+    create_transaction_view,
+)
+
+
+# Dimension tables broadcast to every worker once, by the pool initializer
+_broadcast = {}
+
+
+def hash_partition(
+    transactions_df: pd.DataFrame, n_partitions: int, key: str = "customer_id"
+):
+    """
+    Split transactions into n_partitions by hashing `key`.
+    Every row of a given customer ends up in the same partition, so
+    per-customer features computed inside a partition are exact.
+    """
+    return list(iter_hash_partitions(transactions_df, n_partitions, key))
+
+
+def _partition_order(
+    transactions_df: pd.DataFrame, n_partitions: int, key: str = "customer_id"
+):
+    """
+    Row positions grouped by partition of hash(`key`), and the bounds of
+    each partition in that order: partition i is order[bounds[i]:bounds[i + 1]].
+    One hash, one stable argsort and one bincount over the whole frame; rows
+    keep their original order inside a partition.
+    """
+    hashes = pd.util.hash_pandas_object(transactions_df[key], index=False).to_numpy()
+    # small unsigned ids, so the stable argsort is a radix sort
+    id_dtype = np.uint8 if n_partitions <= 256 else np.uint32
+    partition_ids = (hashes % n_partitions).astype(id_dtype)
+    order = np.argsort(partition_ids, kind="stable")
+    bounds = np.concatenate(
+        ([0], np.cumsum(np.bincount(partition_ids, minlength=n_partitions)))
+    )
+    return order, bounds
+
+
+def iter_hash_partitions(
+    transactions_df: pd.DataFrame, n_partitions: int, key: str = "customer_id"
+):
+    """
+    Hash partitions of transactions_df yielded one at a time, so only one
+    partition's copy exists next to the frame at any moment.
+    """
+    order, bounds = _partition_order(transactions_df, n_partitions, key)
+    for i in range(n_partitions):
+        yield transactions_df.iloc[order[bounds[i] : bounds[i + 1]]]
+
+
+def _init_worker(customers_df: pd.DataFrame, products_df: pd.DataFrame):
+    _broadcast["customers"] = customers_df
+    _broadcast["products"] = products_df
+
+
+def partial_aggregates(merged_df: pd.DataFrame, top_n: int = 10):
+    """
+    Decomposable pieces of revenue_and_customer_analysis for one partition.
+    Means are kept as sum + count so they can be merged exactly.
+    """
+    merged_df["month"] = lookup_date_attributes(
+        merged_df["transaction_date"], ["period"]
+    )["period"]
+    amount = "final_amount"
+
+    return {
+        "category": merged_df.groupby("category")[amount].agg(["sum", "count"]),
+        "month": merged_df.groupby("month")[amount].agg(["sum"]),
+        "country": merged_df.groupby("country")[amount].agg(["sum"]),
+        "payment_method": merged_df.groupby("payment_method")[amount].agg(
+            ["sum", "count"]
+        ),
+        # customers never span partitions, so a local top-n is enough
+        "customer_purchases": merged_df["customer_id"].value_counts().head(top_n),
+        "age_group": merged_df.groupby("age_group")[amount].agg(["sum", "count"]),
+        "country_category": merged_df.groupby(["country", "category"]).size(),
+        "is_weekend": merged_df.groupby("is_weekend")[amount].agg(["sum", "count"]),
+        "product": merged_df.groupby(["product_id", "product_name"])[
+            [amount, "quantity"]
+        ].sum(),
+    }
+
+
+def _transform_partition(
+    transactions_part: pd.DataFrame,
+    customers_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+):
+    merged_df = create_transaction_view(
+        customers_df, products_df, transactions_part, verbose=False
+    )
+    merged_df = add_financial_features(merged_df)
+    merged_df = add_temporal_features(merged_df)
+    merged_df = add_categorical_features(merged_df)
+    merged_df = add_rfm_features(merged_df)
+
+    partials = partial_aggregates(merged_df)
+    partials["unmatched_customers"] = int(
+        (~transactions_part["customer_id"].isin(customers_df["customer_id"])).sum()
+    )
+    partials["unmatched_products"] = int(
+        (~transactions_part["product_id"].isin(products_df["product_id"])).sum()
+    )
+
+    return merged_df, partials
+
+
+def _process_partition(transactions_part: pd.DataFrame, return_frame: bool):
+    merged_df, partials = _transform_partition(
+        transactions_part, _broadcast["customers"], _broadcast["products"]
+    )
+    return partials, (merged_df if return_frame else None)
+
+
+def merge_partial_aggregates(partials_list: list, top_n: int = 10):
+    """
+    Combine per-partition partial aggregates into the final analysis results.
+    """
+    if not partials_list:
+        raise ValueError("No partial aggregates to merge")
+
+    def combine(name):
+        parts = [p[name] for p in partials_list if len(p[name])]
+        if not parts:
+            return partials_list[0][name]
+        return pd.concat(parts).groupby(level=list(range(parts[0].index.nlevels))).sum()
+
+    category = combine("category")
+    payment = combine("payment_method")
+    age_group = combine("age_group")
+    weekend = combine("is_weekend")
+    product = combine("product")
+
+    country_category = combine("country_category").reset_index(name="count")
+    popular_category_by_country = (
+        country_category.sort_values(
+            ["country", "count", "category"], ascending=[True, False, True]
+        )
+        .drop_duplicates("country")
+        .set_index("country")["category"]
+    )
+
+    weekend_pattern = pd.DataFrame(
+        {
+            "count": weekend["count"],
+            "sum": weekend["sum"],
+            "mean": weekend["sum"] / weekend["count"],
+        }
+    )
+    weekend_pattern.index = weekend_pattern.index.map({True: "Weekend", False: "Weekday"})
+
+    avg_value_by_category = (category["sum"] / category["count"]).rename("final_amount")
+
+    return {
+        "unmatched_customers": sum(p["unmatched_customers"] for p in partials_list),
+        "unmatched_products": sum(p["unmatched_products"] for p in partials_list),
+        "revenue_by_category": category["sum"]
+        .rename("final_amount")
+        .sort_values(ascending=False),
+        "monthly_revenue": combine("month")["sum"].rename("final_amount").sort_index(),
+        "revenue_by_country": combine("country")["sum"]
+        .rename("final_amount")
+        .sort_values(ascending=False)
+        .head(5),
+        "avg_transaction_value": (payment["sum"] / payment["count"]).rename(
+            "final_amount"
+        ),
+        "purchases_per_customer": pd.concat(
+            [p["customer_purchases"] for p in partials_list]
+        )
+        .sort_values(ascending=False)
+        .head(top_n),
+        "avg_spending_by_age_group": (age_group["sum"] / age_group["count"])
+        .rename("final_amount")
+        .sort_index(),
+        "popular_category_by_country": popular_category_by_country,
+        "weekend_pattern": weekend_pattern,
+        "top_products_revenue": product["final_amount"]
+        .sort_values(ascending=False)
+        .head(top_n),
+        "top_products_quantity": product["quantity"]
+        .sort_values(ascending=False)
+        .head(top_n),
+        "avg_value_by_category": avg_value_by_category,
+    }
+
+
+def run_partitioned_pipeline(
+    customers_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+    transactions_df: pd.DataFrame,
+    n_workers: int = None,
+    n_partitions: int = None,
+    return_frame: bool = False,
+):
+    """
+    Shared-nothing version of the transformations pipeline.
+    Transactions are hash-partitioned by customer_id, customers/products are
+    broadcast to each worker, and every partition runs the join and feature
+    steps independently. Returns (merged results, merged frame or None).
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_partitions = n_partitions or n_workers
+
+    partitions = [
+        part for part in hash_partition(transactions_df, n_partitions) if len(part)
+    ]
+    # No transactions: one empty partition still gives empty results
+    partitions = partitions or [transactions_df]
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(customers_df, products_df),
+    ) as executor:
+        outputs = list(
+            executor.map(
+                _process_partition, partitions, [return_frame] * len(partitions)
+            )
+        )
+
+    results = merge_partial_aggregates([partials for partials, _ in outputs])
+
+    merged_df = None
+    if return_frame:
+        merged_df = pd.concat([frame for _, frame in outputs]).reset_index(drop=True)
+
+    return results, merged_df
+
+
+def run_governed_pipeline(
+    customers_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+    transactions,
+    memory_budget: int = None,
+    spill_dir: str = None,
+    governor: MemoryGovernor = None,
+):
+    """
+    Transformations pipeline under a memory budget in bytes.
+    transactions is a CSV path or an already loaded DataFrame. The footprint
+    of the join, feature and aggregate stages is estimated from its size and
+    schema. If it fits, everything runs in memory in one piece; otherwise
+    transactions are split into customer_id hash partitions (streamed from
+    disk and spilled, for a path) and processed one partition at a time, with
+    each merged partition spilled back to disk. Group aggregates are computed
+    per partition and merged, so they run on the same partitions.
+    Pass either memory_budget or an existing governor. Prints the chosen plan
+    per stage and returns (results, merged partitions, governor); merged
+    partitions are DataFrames when run in memory and spill files otherwise,
+    readable with governor.load() and removed by governor.cleanup().
+    """
+    governor = governor or MemoryGovernor(memory_budget, spill_dir)
+    memory_budget = governor.memory_budget
+
+    if isinstance(transactions, pd.DataFrame):
+        transaction_bytes = estimate_frame_bytes(transactions)
+        transaction_rows = len(transactions)
+    else:
+        transaction_bytes, transaction_rows = estimate_csv_bytes(transactions)
+    dimension_row_bytes = sum(
+        estimate_frame_bytes(df) / max(len(df), 1) for df in (customers_df, products_df)
+    )
+    merged_bytes = transaction_bytes + transaction_rows * dimension_row_bytes
+
+    n_partitions = governor.plan(
+        "create_transaction_view + add_*_features",
+        merged_bytes
+        * max(STAGE_MEMORY_FACTORS["join"], STAGE_MEMORY_FACTORS["features"]),
+    )
+    governor.plan(
+        "revenue_and_customer_analysis (group aggregates)",
+        merged_bytes * STAGE_MEMORY_FACTORS["group_aggregate"],
+        spills=False,
+        partitions=n_partitions,
+    )
+
+    if n_partitions == 1:
+        if not isinstance(transactions, pd.DataFrame):
+            transactions = pd.read_csv(transactions)
+        merged_df, partials = _transform_partition(
+            transactions, customers_df, products_df
+        )
+        results = merge_partial_aggregates([partials])
+        governor.report()
+        return results, [merged_df], governor
+
+    if isinstance(transactions, pd.DataFrame):
+        # Already in memory: cut the partitions from it one at a time
+        partition_sources = (
+            [part] for part in iter_hash_partitions(transactions, n_partitions)
+        )
+    else:
+        # Read in chunks small enough to hash and spill within the budget
+        chunk_rows = max(
+            1_000,
+            int(
+                memory_budget
+                / (transaction_bytes / transaction_rows)
+                / STAGE_MEMORY_FACTORS["join"]
+            ),
+        )
+        partition_sources = spill_hash_partitions(
+            transactions, "customer_id", n_partitions, governor, chunksize=chunk_rows
+        )
+
+    partials_list = []
+    merged_partitions = []
+    for i, sources in enumerate(partition_sources):
+        if not sources:
+            continue
+        if isinstance(sources[0], pd.DataFrame):
+            transactions_part = sources[0]
+        else:
+            transactions_part = pd.concat([governor.load(path) for path in sources])
+            for path in sources:
+                os.remove(path)
+        if transactions_part.empty:
+            continue
+
+        merged_df, partials = _transform_partition(
+            transactions_part, customers_df, products_df
+        )
+        partials_list.append(partials)
+        merged_partitions.append(governor.spill(merged_df, f"merged_p{i}"))
+
+    results = merge_partial_aggregates(partials_list)
+    governor.report()
+    return results, merged_partitions, governor
+
+
+def print_partitioned_analysis(results: dict):
+
+    print("unmatched products: ", results["unmatched_products"])
+    print("unmatched customers: ", results["unmatched_customers"])
+
+    print("\n--- REVENUE ANALYSIS ---\n")
+    print("Total Revenue by Product Category:")
+    print(results["revenue_by_category"], "\n")
+    print("Monthly Revenue Trend:")
+    print(results["monthly_revenue"], "\n")
+    print("Top 5 Countries by Revenue:")
+    print(results["revenue_by_country"], "\n")
+    print("Average Transaction Value by Payment Method:")
+    print(results["avg_transaction_value"], "\n")
+
+    print("\n--- CUSTOMER BEHAVIOR ANALYSIS ---\n")
+    print("Top 10 Customers by Purchase Count:")
+    print(results["purchases_per_customer"], "\n")
+    print("Average Spending by Age Group:")
+    print(results["avg_spending_by_age_group"], "\n")
+    print("Most Popular Product Category by Country:")
+    print(results["popular_category_by_country"], "\n")
+    print("Weekend vs Weekday Transaction Patterns:")
+    print(results["weekend_pattern"], "\n")
+
+    print("\n--- PRODUCT PERFORMANCE ANALYSIS ---\n")
+    print("Top 10 Products by Revenue:")
+    print(results["top_products_revenue"], "\n")
+    print("Top 10 Products by Quantity Sold:")
+    print(results["top_products_quantity"], "\n")
+
+    avg_value_by_category = results["avg_value_by_category"]
+    print(
+        f"Category with Highest Average Transaction Value: {avg_value_by_category.idxmax()}"
+    )
+    print(avg_value_by_category.sort_values(ascending=False), "\n")
+
+
+def main():
+    customers_df = pd.read_csv("data/cleaned/customers.csv")
+    products_df = pd.read_csv("data/cleaned/products_clean.csv")
+    transactions_df = pd.read_csv("data/cleaned/transactions_clean.csv")
+
+    results, _ = run_partitioned_pipeline(customers_df, products_df, transactions_df)
+    print_partitioned_analysis(results)
+
+
+if __name__ == "__main__":
+    main()
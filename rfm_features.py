@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+def _rolling_customer_features(
+    sort_key: np.ndarray,
+    customers: np.ndarray,
+    days: np.ndarray,
+    amounts: np.ndarray,
+    windows: tuple,
+):
+    """
+    Features for arrays already sorted by sort_key, i.e. by (customer, day).
+    Running totals come from one cumulative sum and each row's window start
+    is found by binary search, so no per-row or per-customer Python loop runs.
+    """
+    n_rows = len(customers)
+    positions = np.arange(n_rows)
+
+    # Index of the first row of each customer's run
+    is_first = np.ones(n_rows, dtype=bool)
+    is_first[1:] = customers[1:] != customers[:-1]
+    run_start = np.maximum.accumulate(np.where(is_first, positions, 0))
+
+    cum_amount = np.concatenate(([0.0], np.cumsum(amounts)))
+    features = {}
+
+    # Recency: days since the customer's previous transaction
+    recency = np.full(n_rows, np.nan)
+    recency[1:][~is_first[1:]] = (days[1:] - days[:-1])[~is_first[1:]]
+    features["recency_days"] = recency
+
+    # Frequency and monetary value up to and including this transaction
+    features["frequency"] = positions - run_start + 1
+    features["monetary"] = cum_amount[positions + 1] - cum_amount[run_start]
+
+    for window in windows:
+        window_start = np.searchsorted(sort_key, sort_key - window + 1, side="left")
+        features[f"spend_{window}d"] = (
+            cum_amount[positions + 1] - cum_amount[window_start]
+        )
+        features[f"purchases_{window}d"] = positions - window_start + 1
+
+    return features
+
+
+def add_rfm_features(
+    merged_df: pd.DataFrame,
+    windows: tuple = (7, 30, 90),
+    amount_col: str = "final_amount",
+):
+    """
+    Point-in-time recency, frequency, monetary value and rolling 7/30/90-day
+    spend and purchase counts per customer, at every transaction.
+    Values only look at the customer's transactions up to and including the
+    current row, so nothing leaks from the future. Rows without a customer_id
+    or a valid transaction_date get NA features.
+    """
+    customer_codes, _ = pd.factorize(merged_df["customer_id"])
+    dates = pd.to_datetime(merged_df["transaction_date"], errors="coerce")
+    amounts = (
+        pd.to_numeric(merged_df[amount_col], errors="coerce")
+        .fillna(0)
+        .to_numpy(dtype=np.float64)
+    )
+
+    valid = (customer_codes >= 0) & dates.notna().to_numpy()
+    valid_rows = np.flatnonzero(valid)
+    days = dates.to_numpy()[valid].astype("datetime64[D]").astype(np.int64)
+    customers = customer_codes[valid].astype(np.int64)
+
+    # Customers are spaced further apart than the date range plus the widest
+    # window, so one searchsorted over this key never crosses customers
+    day_offset = days - days.min() if len(days) else days
+    span = (int(day_offset.max()) if len(days) else 0) + max(windows) + 1
+    sort_key = customers * span + day_offset
+
+    # Stable, so same-day transactions keep their original order
+    order = np.argsort(sort_key, kind="stable")
+    features = _rolling_customer_features(
+        sort_key[order], customers[order], days[order], amounts[valid][order], windows
+    )
+
+    # Scatter the sorted results back to the original row order in one pass
+    names = list(features)
+    restored = np.full((len(merged_df), len(names)), np.nan)
+    restored[valid_rows[order]] = np.column_stack([features[name] for name in names])
+    for i, name in enumerate(names):
+        merged_df[name] = restored[:, i]
+
+    for name in ["frequency"] + [f"purchases_{window}d" for window in windows]:
+        merged_df[name] = merged_df[name].astype("Int64")
+
+    return merged_df
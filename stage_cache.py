@@ -0,0 +1,296 @@
+import hashlib
+import inspect
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+def _update_hash(hasher, value):
+    """
+    Feed a stage input into the hasher. DataFrames and Series are hashed by
+    content (values, index, column names and dtypes), containers recursively,
+    objects with a cache_key() method by that key, anything else through its
+    pickle bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        hasher.update(b"DataFrame")
+        hasher.update(repr(list(value.columns)).encode())
+        hasher.update(repr([str(dtype) for dtype in value.dtypes]).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        hasher.update(b"Series")
+        hasher.update(repr((value.name, str(value.dtype))).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(repr((value.dtype.str, value.shape)).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif hasattr(value, "cache_key"):
+        hasher.update(type(value).__qualname__.encode())
+        hasher.update(value.cache_key())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict:{len(value)}".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(hasher, key)
+            _update_hash(hasher, value[key])
+    else:
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _is_project_file(path, root: str) -> bool:
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    return path.startswith(root + os.sep) and "site-packages" not in path
+
+
+def _code_names(code) -> set:
+    """
+    Global and attribute names used by a code object and its nested
+    functions, lambdas and comprehensions.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _describe_value(value, root: str, sources: dict) -> str:
+    """
+    Stable description of a global a stage refers to. Project functions and
+    classes are described by name and their source collected; containers
+    recursively; anything else by type only, since its repr may hold a
+    memory address.
+    """
+    if inspect.isfunction(value) or inspect.isclass(value):
+        _collect_sources(value, root, sources)
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, dict):
+        items = sorted(
+            (_describe_value(k, root, sources), _describe_value(v, root, sources))
+            for k, v in value.items()
+        )
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_describe_value(item, root, sources) for item in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return f"{type(value).__name__}[" + ", ".join(items) + "]"
+    if value is None or isinstance(
+        value, (str, bytes, bool, int, float, pd.Timedelta, pd.Timestamp)
+    ):
+        return repr(value)
+    return f"<{type(value).__module__}.{type(value).__qualname__}>"
+
+
+def _collect_sources(obj, root: str, sources: dict):
+    """
+    Add the source of a project function or class to `sources`, then follow
+    the globals it uses: project functions and classes recursively, project
+    modules by their whole file, and module-level constants by value.
+    """
+    try:
+        source_file = inspect.getsourcefile(obj)
+    except TypeError:
+        return
+    if not _is_project_file(source_file, root):
+        return
+
+    name = f"{obj.__module__}.{obj.__qualname__}"
+    if name in sources:
+        return
+    try:
+        sources[name] = inspect.getsource(obj)
+    except OSError:
+        sources[name] = name
+        return
+
+    if inspect.isclass(obj):
+        for member in vars(obj).values():
+            member = getattr(member, "__func__", member)
+            if inspect.isfunction(member):
+                _collect_sources(member, root, sources)
+        return
+
+    for global_name in sorted(_code_names(obj.__code__)):
+        if global_name not in obj.__globals__:
+            continue
+        value = obj.__globals__[global_name]
+        if inspect.ismodule(value):
+            module_file = getattr(value, "__file__", None)
+            module_key = f"{value.__name__}:module"
+            if _is_project_file(module_file, root) and module_key not in sources:
+                with open(module_file, encoding="utf-8") as f:
+                    sources[module_key] = f.read()
+            continue
+        # own namespace, so a helper's description never replaces its source
+        sources[f"{obj.__module__}:global:{global_name}"] = _describe_value(
+            value, root, sources
+        )
+
+
+def code_version(func) -> str:
+    """
+    Hash of the stage's source code and of every project function, class,
+    module and constant it depends on, so editing a stage or any helper it
+    calls invalidates its results.
+    """
+    sources = {}
+    try:
+        root = os.path.dirname(os.path.abspath(inspect.getsourcefile(func)))
+        _collect_sources(func, root, sources)
+    except TypeError:
+        pass
+    if not sources:
+        sources[func.__qualname__] = f"{func.__module__}.{func.__qualname__}"
+
+    hasher = hashlib.sha256()
+    for name in sorted(sources):
+        hasher.update(name.encode())
+        hasher.update(sources[name].encode())
+    return hasher.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed memoization of pipeline stages on local disk.
+    A stage result is keyed by the stage name, its code version and the
+    hashes of its inputs and parameters. Entries are pickled into cache_dir
+    and evicted least-recently-used first once the directory grows past
+    max_bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = ".stage_cache",
+        max_bytes: int = 2 * 1024**3,
+        verbose: bool = True,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def stage_key(self, stage_name: str, version: str, *args, **kwargs) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(stage_name.encode())
+        hasher.update(version.encode())
+        _update_hash(hasher, args)
+        _update_hash(hasher, kwargs)
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(f"[stage cache] {message}")
+
+    def _get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+        # Touch the entry so LRU eviction sees it as recently used
+        os.utime(path)
+        return True, result
+
+    def _put(self, key: str, result):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def run(self, stage, *args, **kwargs):
+        """
+        Run stage(*args, **kwargs), or return its stored result if the same
+        code has already run on the same inputs.
+        Inputs with a replan() method (a MemoryGovernor) record plans while
+        the stage runs; those plans are stored with the result and replayed
+        on a cache hit, so the plan report still lists every stage.
+        """
+        stage_name = f"{stage.__module__}.{stage.__qualname__}"
+        key = self.stage_key(
+            stage_name, "with-plans:" + code_version(stage), *args, **kwargs
+        )
+        planners = [
+            value for value in (*args, *kwargs.values()) if hasattr(value, "replan")
+        ]
+
+        found, entry = self._get(key)
+        if found:
+            result, stored_plans = entry
+            for planner, plans in zip(planners, stored_plans):
+                planner.replan(plans)
+            self._log(f"{stage.__name__}: unchanged, reused {key[:12]}")
+            return result
+
+        self._log(f"{stage.__name__}: running")
+        plans_before = [len(planner.plans) for planner in planners]
+        result = stage(*args, **kwargs)
+        stored_plans = [
+            planner.plans[before:] for planner, before in zip(planners, plans_before)
+        ]
+        self._put(key, (result, stored_plans))
+        return result
+
+    def read_csv(self, path: str, **kwargs) -> pd.DataFrame:
+        """
+        Cached load stage. Keyed by the file's path, size and modification
+        time so an unchanged file is not parsed again.
+        """
+        stat = os.stat(path)
+        file_id = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        key = self.stage_key("load", f"pandas-{pd.__version__}", file_id, **kwargs)
+
+        found, result = self._get(key)
+        if found:
+            self._log(f"load {path}: unchanged, reused {key[:12]}")
+            return result
+
+        self._log(f"load {path}: reading")
+        result = pd.read_csv(path, **kwargs)
+        self._put(key, result)
+        return result
+
+    def evict(self):
+        """
+        Delete least-recently-used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self._log(f"evicted {os.path.basename(path)[:12]}")
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,269 @@
+import pandas as pd
+
+
+def _empty_window_frame(key_cols: list) -> pd.DataFrame:
+    """
+    Empty aggregate frame with the dtypes of filled ones, so that concat and
+    groupby over it keep count int64, value_sum float64 and window bounds
+    datetime64 instead of falling back to object.
+    """
+    columns = {
+        col: pd.Series(dtype="datetime64[ns]" if col.startswith("window_") else object)
+        for col in key_cols
+    }
+    columns["count"] = pd.Series(dtype="int64")
+    columns["value_sum"] = pd.Series(dtype="float64")
+    return pd.DataFrame(columns)
+
+
+class WatermarkIngest:
+    """
+    Streaming ingest of transaction batches by event time (transaction_date).
+
+    The watermark trails the latest on-time event seen by allowed_lateness.
+    Each record is routed by comparing it with the watermark from before its
+    batch:
+    - dated after processing time + max_future, or unparseable: quarantine;
+    - in a window that is still open: buffered into that window;
+    - in a window that was already emitted: correction stream. Its
+      contribution is emitted as a delta for that window, so rollups built
+      from emitted windows stay correct without re-scanning history.
+    Late records older than correction_horizon below the watermark are
+    quarantined instead. Quarantined and late raw records are kept in
+    buffers of at most buffer_limit rows; overflow is counted and dropped.
+    Processing time is `now`: a clock called per batch (default
+    pd.Timestamp.now) or a fixed timestamp, as clean_transactions takes.
+    """
+
+    def __init__(
+        self,
+        window="1D",
+        allowed_lateness=pd.Timedelta(days=1),
+        max_future=pd.Timedelta(0),
+        correction_horizon=None,
+        value_col: str = "quantity",
+        group_cols: list = None,
+        buffer_limit: int = 10_000,
+        now=pd.Timestamp.now,
+    ):
+        self.window = pd.Timedelta(window)
+        self.allowed_lateness = pd.Timedelta(allowed_lateness)
+        self.max_future = pd.Timedelta(max_future)
+        self.correction_horizon = (
+            pd.Timedelta(correction_horizon) if correction_horizon is not None else None
+        )
+        self.value_col = value_col
+        self.group_cols = list(group_cols or [])
+        self.buffer_limit = buffer_limit
+        self.now = now
+
+        self.watermark = None
+        self.key_cols = ["window_start"] + self.group_cols
+        self.open_windows = self._empty_aggregates()
+        self.quarantine = pd.DataFrame()
+        self.late_records = pd.DataFrame()
+        self.stats = {
+            "records_seen": 0,
+            "on_time": 0,
+            "late_corrected": 0,
+            "quarantined_future": 0,
+            "quarantined_invalid_date": 0,
+            "quarantined_too_late": 0,
+            "windows_emitted": 0,
+            "buffer_overflow_dropped": 0,
+        }
+
+    def _empty_aggregates(self) -> pd.DataFrame:
+        return _empty_window_frame(self.key_cols)
+
+    def _aggregate(self, records: pd.DataFrame) -> pd.DataFrame:
+        if records.empty:
+            return self._empty_aggregates()
+        return (
+            records.groupby(self.key_cols, dropna=False)
+            .agg(count=(self.value_col, "size"), value_sum=(self.value_col, "sum"))
+            .reset_index()
+        )
+
+    def _bounded_append(self, buffer: pd.DataFrame, records: pd.DataFrame, reason: str):
+        if records.empty:
+            return buffer
+        records = records.assign(reason=reason)
+        buffer = pd.concat([buffer, records]) if not buffer.empty else records
+        overflow = len(buffer) - self.buffer_limit
+        if overflow > 0:
+            self.stats["buffer_overflow_dropped"] += overflow
+            buffer = buffer.iloc[overflow:]
+        return buffer
+
+    def _with_window_end(self, aggregates: pd.DataFrame) -> pd.DataFrame:
+        aggregates = aggregates.copy()
+        aggregates.insert(1, "window_end", aggregates["window_start"] + self.window)
+        return aggregates.reset_index(drop=True)
+
+    def ingest(self, batch: pd.DataFrame) -> dict:
+        """
+        Process one batch. Returns the windows finalized by this batch and
+        the corrections to previously emitted windows, both as DataFrames
+        keyed by window_start/window_end (+ group_cols) with count and
+        value_sum columns.
+        """
+        records = batch.copy()
+        records["transaction_date"] = pd.to_datetime(
+            records["transaction_date"], errors="coerce"
+        )
+        records[self.value_col] = pd.to_numeric(records[self.value_col], errors="coerce")
+        records["window_start"] = records["transaction_date"].dt.floor(self.window)
+        self.stats["records_seen"] += len(records)
+
+        invalid = records["transaction_date"].isna()
+        now = self.now() if callable(self.now) else pd.Timestamp(self.now)
+        future = records["transaction_date"] > now + self.max_future
+
+        if self.watermark is None:
+            late = pd.Series(False, index=records.index)
+        else:
+            # the window is closed once its end is at or below the watermark
+            late = records["window_start"] + self.window <= self.watermark
+        too_late = pd.Series(False, index=records.index)
+        if self.correction_horizon is not None and self.watermark is not None:
+            too_late = late & (
+                records["transaction_date"] < self.watermark - self.correction_horizon
+            )
+
+        late = late & ~invalid & ~future & ~too_late
+        on_time = ~invalid & ~future & ~late & ~too_late
+
+        self.quarantine = self._bounded_append(
+            self.quarantine, records[invalid], "invalid_date"
+        )
+        self.quarantine = self._bounded_append(
+            self.quarantine, records[future & ~invalid], "future_date"
+        )
+        self.quarantine = self._bounded_append(
+            self.quarantine, records[too_late & ~invalid & ~future], "too_late"
+        )
+        self.late_records = self._bounded_append(
+            self.late_records, records[late], "late"
+        )
+
+        self.stats["quarantined_invalid_date"] += int(invalid.sum())
+        self.stats["quarantined_future"] += int((future & ~invalid).sum())
+        self.stats["quarantined_too_late"] += int((too_late & ~invalid & ~future).sum())
+        self.stats["late_corrected"] += int(late.sum())
+        self.stats["on_time"] += int(on_time.sum())
+
+        corrections = self._aggregate(records[late])
+
+        # Fold on-time records into the open windows
+        on_time_records = records[on_time]
+        if not on_time_records.empty:
+            self.open_windows = (
+                pd.concat([self.open_windows, self._aggregate(on_time_records)])
+                .groupby(self.key_cols, dropna=False)[["count", "value_sum"]]
+                .sum()
+                .reset_index()
+            )
+            candidate = on_time_records["transaction_date"].max() - self.allowed_lateness
+            if self.watermark is None or candidate > self.watermark:
+                self.watermark = candidate
+
+        emitted = self._emit(closed_only=True)
+
+        return {
+            "emitted": emitted,
+            "corrections": self._with_window_end(corrections),
+            "watermark": self.watermark,
+        }
+
+    def _emit(self, closed_only: bool) -> pd.DataFrame:
+        if self.open_windows.empty:
+            return self._with_window_end(self._empty_aggregates())
+
+        if closed_only:
+            if self.watermark is None:
+                return self._with_window_end(self._empty_aggregates())
+            closed = self.open_windows["window_start"] + self.window <= self.watermark
+        else:
+            closed = pd.Series(True, index=self.open_windows.index)
+
+        emitted = self.open_windows[closed]
+        self.open_windows = self.open_windows[~closed].reset_index(drop=True)
+        self.stats["windows_emitted"] += len(emitted)
+
+        return self._with_window_end(
+            emitted.sort_values(self.key_cols).reset_index(drop=True)
+        )
+
+    def flush(self) -> pd.DataFrame:
+        """
+        End of stream: emit every window that is still open and move the
+        watermark past them, so any later record counts as a correction.
+        """
+        emitted = self._emit(closed_only=False)
+        if not emitted.empty:
+            latest_end = emitted["window_end"].max()
+            if self.watermark is None or latest_end > self.watermark:
+                self.watermark = latest_end
+        return emitted
+
+    def report(self):
+        print("--- STREAMING INGEST REPORT ---")
+        print(f"Watermark: {self.watermark}")
+        print(f"Records seen: {self.stats['records_seen']}")
+        print(f"On-time records: {self.stats['on_time']}")
+        print(f"Late records sent as corrections: {self.stats['late_corrected']}")
+        print(f"Future-dated records quarantined: {self.stats['quarantined_future']}")
+        print(
+            f"Invalid-date records quarantined: {self.stats['quarantined_invalid_date']}"
+        )
+        print(f"Too-late records quarantined: {self.stats['quarantined_too_late']}")
+        print(f"Windows emitted: {self.stats['windows_emitted']}")
+        print(f"Buffered records dropped (over limit): {self.stats['buffer_overflow_dropped']}")
+        print("--------------------------------\n")
+
+
+class WindowRollup:
+    """
+    Downstream rollup kept up to date from emitted windows and corrections
+    only, without re-reading earlier records.
+    """
+
+    def __init__(self, key_cols: list = None):
+        self.key_cols = ["window_start", "window_end"] + list(key_cols or [])
+        self.totals = _empty_window_frame(self.key_cols)
+
+    def apply(self, result: dict):
+        updates = [
+            frame
+            for frame in (result.get("emitted"), result.get("corrections"))
+            if frame is not None and not frame.empty
+        ]
+        if not updates:
+            return self.totals
+
+        frames = [self.totals] + updates if not self.totals.empty else updates
+        self.totals = (
+            pd.concat(frames)
+            .groupby(self.key_cols, dropna=False)[["count", "value_sum"]]
+            .sum()
+            .reset_index()
+        )
+        return self.totals
+
+
+def stream_csv_batches(path: str, batch_rows: int = 10_000):
+    for batch in pd.read_csv(path, chunksize=batch_rows):
+        yield batch
+
+
+def run_streaming_ingest(path: str, batch_rows: int = 10_000, **ingest_kwargs):
+    ingest = WatermarkIngest(**ingest_kwargs)
+    rollup = WindowRollup(ingest.group_cols)
+
+    for batch in stream_csv_batches(path, batch_rows):
+        rollup.apply(ingest.ingest(batch))
+    rollup.apply({"emitted": ingest.flush()})
+
+    ingest.report()
+    return rollup.totals, ingest
@@ -0,0 +1,142 @@
+import pandas as pd
+import pytest
+
+from lazy_plan import revenue_by_category, transaction_view_plan, weekend_pattern
+from rfm_features import add_rfm_features
+from transformations import (
+    ANALYSIS_COLUMNS,
+    add_categorical_features,
+    add_financial_features,
+    add_temporal_features,
+    create_transaction_view,
+    revenue_and_customer_analysis,
+)
+
+CUSTOMERS = "data/cleaned/customers.csv"
+PRODUCTS = "data/cleaned/products_clean.csv"
+TRANSACTIONS = "data/cleaned/transactions_clean.csv"
+
+JUNE = pd.Timestamp("2024-06-01")
+
+
+@pytest.fixture(scope="module")
+def eager_view():
+    merged_df = create_transaction_view(
+        pd.read_csv(CUSTOMERS),
+        pd.read_csv(PRODUCTS),
+        pd.read_csv(TRANSACTIONS),
+        verbose=False,
+    )
+    merged_df = add_financial_features(merged_df)
+    merged_df = add_temporal_features(merged_df)
+    merged_df = add_categorical_features(merged_df)
+    return add_rfm_features(merged_df)
+
+
+@pytest.fixture
+def plan():
+    return transaction_view_plan(CUSTOMERS, PRODUCTS, TRANSACTIONS)
+
+
+def by_transaction(dataframe, columns):
+    return (
+        dataframe[["transaction_id"] + columns]
+        .sort_values("transaction_id")
+        .reset_index(drop=True)
+    )
+
+
+def test_not_equal_on_joined_column_keeps_unmatched_rows(plan, eager_view):
+    columns = ["transaction_id", "country", "final_amount"]
+    lazy = plan.filter("country", "!=", "France").collect(columns)
+    eager = eager_view[eager_view["country"] != "France"]
+
+    assert eager["country"].isna().any()
+    pd.testing.assert_frame_equal(
+        by_transaction(lazy, columns[1:]), by_transaction(eager, columns[1:])
+    )
+    assert "left join data/cleaned/customers.csv" in plan.filter(
+        "country", "!=", "France"
+    ).explain(columns)
+
+
+def test_equal_on_joined_column_runs_in_right_scan(plan, eager_view):
+    columns = ["transaction_id", "country", "final_amount"]
+    filtered = plan.filter("country", "==", "France")
+    eager = eager_view[eager_view["country"] == "France"]
+
+    pd.testing.assert_frame_equal(
+        by_transaction(filtered.collect(columns), columns[1:]),
+        by_transaction(eager, columns[1:]),
+    )
+    assert "inner join data/cleaned/customers.csv" in filtered.explain(columns)
+
+
+def test_date_filter_reaches_scan_when_customer_features_are_pruned(plan, eager_view):
+    columns = ["transaction_id", "final_amount"]
+    filtered = plan.filter("transaction_date", ">=", JUNE)
+    eager = eager_view[eager_view["transaction_date"] >= JUNE]
+
+    pd.testing.assert_frame_equal(
+        by_transaction(filtered.collect(columns), columns[1:]),
+        by_transaction(eager, columns[1:]),
+    )
+    scan_line = filtered.explain(columns).splitlines()[0]
+    assert "filters=[transaction_date >=" in scan_line
+
+
+def test_date_filter_stays_above_customer_features_it_would_change(plan, eager_view):
+    columns = ["transaction_id", "customer_segment", "recency_days"]
+    filtered = plan.filter("transaction_date", ">=", JUNE)
+    eager = eager_view[eager_view["transaction_date"] >= JUNE]
+
+    pd.testing.assert_frame_equal(
+        by_transaction(filtered.collect(columns), columns[1:]),
+        by_transaction(eager, columns[1:]),
+    )
+    assert "filters=[]" in filtered.explain(columns).splitlines()[0]
+
+
+def test_category_aggregate_with_date_filter(plan, eager_view):
+    filtered = plan.filter("transaction_date", ">=", JUNE)
+    eager = (
+        eager_view[eager_view["transaction_date"] >= JUNE]
+        .groupby("category")["final_amount"]
+        .sum()
+        .sort_values(ascending=False)
+    )
+
+    pd.testing.assert_series_equal(revenue_by_category(filtered), eager)
+    explained = filtered.aggregate("category", "final_amount", "sum").explain()
+    assert "filters=[transaction_date >=" in explained.splitlines()[0]
+
+
+def test_weekend_pattern_with_filters(plan, eager_view):
+    filtered = plan.filter("country", "!=", "France").filter(
+        "transaction_date", "between", (JUNE, pd.Timestamp("2024-12-31"))
+    )
+    eager_rows = eager_view[
+        (eager_view["country"] != "France")
+        & eager_view["transaction_date"].between(JUNE, pd.Timestamp("2024-12-31"))
+    ]
+    eager = eager_rows.groupby("is_weekend")["final_amount"].agg(["count", "sum", "mean"])
+    eager.index = eager.index.map({True: "Weekend", False: "Weekday"})
+
+    pd.testing.assert_frame_equal(weekend_pattern(filtered), eager)
+
+
+def test_analysis_over_plan_matches_eager_frame(plan, eager_view, capsys):
+    revenue_and_customer_analysis(eager_view.copy())
+    eager_output = capsys.readouterr().out
+    revenue_and_customer_analysis(plan)
+    lazy_output = capsys.readouterr().out
+
+    assert lazy_output == eager_output
+
+
+def test_analysis_plan_skips_unused_columns(plan):
+    explained = plan.explain(ANALYSIS_COLUMNS)
+
+    for column in ["name", "email", "stock", "registration_date"]:
+        assert f"'{column}'" not in explained
+    assert "feature rfm" not in explained
@@ -0,0 +1,100 @@
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+import rfm_features
+from data_cleaning import clean_products
+from memory_governor import MemoryGovernor
+from stage_cache import StageCache, _collect_sources, code_version
+
+STAGE_MODULE = """
+import pandas as pd
+
+from stage_helpers import shift
+
+THRESHOLD = {threshold}
+
+
+def _double(values):
+    return values * {factor}
+
+
+def stage(values):
+    return shift(_double(values)) > THRESHOLD
+"""
+
+HELPER_MODULE = """
+def shift(values):
+    return values + {offset}
+"""
+
+
+@pytest.fixture
+def write_stage(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def write(factor=2, threshold=10, offset=1):
+        (tmp_path / "stage_module.py").write_text(
+            STAGE_MODULE.format(factor=factor, threshold=threshold)
+        )
+        (tmp_path / "stage_helpers.py").write_text(HELPER_MODULE.format(offset=offset))
+        for name in ("stage_module", "stage_helpers"):
+            sys.modules.pop(name, None)
+        importlib.invalidate_caches()
+        return code_version(importlib.import_module("stage_module").stage)
+
+    yield write
+    for name in ("stage_module", "stage_helpers"):
+        sys.modules.pop(name, None)
+
+
+def test_version_is_stable(write_stage):
+    assert write_stage() == write_stage()
+
+
+def test_editing_same_module_helper_changes_version(write_stage):
+    assert write_stage(factor=2) != write_stage(factor=3)
+
+
+def test_editing_module_constant_changes_version(write_stage):
+    assert write_stage(threshold=10) != write_stage(threshold=11)
+
+
+def test_editing_helper_in_other_module_changes_version(write_stage):
+    assert write_stage(offset=1) != write_stage(offset=2)
+
+
+def test_project_stage_depends_on_its_helpers():
+    sources = {}
+    root = os.path.dirname(os.path.abspath(rfm_features.__file__))
+    _collect_sources(rfm_features.add_rfm_features, root, sources)
+
+    helper_source = sources["rfm_features._rolling_customer_features"]
+    assert helper_source.startswith("def _rolling_customer_features(")
+
+
+def test_cache_hit_replays_governor_plans(tmp_path):
+    products = pd.DataFrame(
+        {
+            "product_id": ["P1", "P1", "P2"],
+            "product_name": ["a", "a", "b"],
+            "category": ["x", "x", "y"],
+            "price": [1.0, 1.0, 2.0],
+            "stock": [1, 1, 2],
+        }
+    )
+    cache = StageCache(str(tmp_path), verbose=False)
+
+    first = MemoryGovernor(10**9, str(tmp_path / "spill"))
+    cache.run(clean_products, products, governor=first)
+    second = MemoryGovernor(1, str(tmp_path / "spill"))
+    result, _ = cache.run(clean_products, products, governor=second)
+
+    assert len(result) == 2
+    assert [plan["stage"] for plan in second.plans] == [
+        plan["stage"] for plan in first.plans
+    ]
+    assert second.plans[0]["plan"] == "chunked (cached, not run)"
@@ -1,10 +1,12 @@
 import pandas as pd
-from Project2_sandro_shubitidze import customers_df, products_df, transactions_df
+from data_cleaning import clean_customers, clean_products, clean_transactions
+from date_dimension import lookup_date_attributes
+from entity_resolution import canonical_customers, rekey_transactions, resolve_customers
+from memory_governor import MemoryGovernor
+from stage_cache import StageCache
 
 
-import pandas as pd
-
-def create_transaction_view(customers_df, products_df, transactions_df):
+def create_transaction_view(customers_df, products_df, transactions_df, verbose=True):
     """
     Used left join and transactions as primary table to have all trasnasctions kept
     """
@@ -26,10 +28,11 @@ def create_transaction_view(customers_df, products_df, transactions_df):
     unmatched_products = merged_final["_merge"].value_counts().get("left_only", 0)
     merged_final.drop(columns="_merge", inplace=True)
 
-    print("unmatched products: ", unmatched_products)
-    print("unmatched customers: ", unmatched_customers)
+    if verbose:
+        print("unmatched products: ", unmatched_products)
+        print("unmatched customers: ", unmatched_customers)
 
-    return cleaned_merged
+    return merged_final
 
 
 def add_financial_features(merged_df):
@@ -61,12 +64,18 @@ def add_temporal_features(merged_df):
         merged_df["registration_date"], errors="coerce"
     )
 
-    # Extract month and weekday
-    merged_df["transaction_month"] = merged_df["transaction_date"].dt.month
-    merged_df["transaction_day_of_week"] = merged_df["transaction_date"].dt.day_name()
+    # Extract month and weekday, computed once per distinct date
+    transaction_calendar = lookup_date_attributes(
+        merged_df["transaction_date"], ["month", "day_name", "year"]
+    )
+    registration_calendar = lookup_date_attributes(
+        merged_df["registration_date"], ["year"]
+    )
+    merged_df["transaction_month"] = transaction_calendar["month"]
+    merged_df["transaction_day_of_week"] = transaction_calendar["day_name"]
 
     merged_df["customer_age_at_purchase"] = (
-        merged_df["transaction_date"].dt.year - merged_df["registration_date"].dt.year
+        transaction_calendar["year"] - registration_calendar["year"]
     ) + merged_df["age"].fillna(0)
 
     return merged_df
@@ -104,14 +113,37 @@ def add_categorical_features(merged_df):
     merged_df["age_group"] = merged_df["age"].apply(age_group)
 
     # Add is_weekend column
-    merged_df["is_weekend"] = merged_df["transaction_date"].dt.day_name().isin(
-        ["Saturday", "Sunday"]
-    )
+    merged_df["is_weekend"] = lookup_date_attributes(
+        merged_df["transaction_date"], ["is_weekend"]
+    )["is_weekend"]
 
     return merged_df
 
+# Columns of the transaction view that revenue_and_customer_analysis reads
+ANALYSIS_COLUMNS = [
+    "transaction_date",
+    "customer_id",
+    "product_id",
+    "quantity",
+    "final_amount",
+    "country",
+    "age_group",
+    "is_weekend",
+    "category",
+    "product_name",
+    "payment_method",
+]
+
+
 def revenue_and_customer_analysis(merged_df):
-   
+    """
+    merged_df is a merged, featured frame, or a lazy plan such as
+    lazy_plan.transaction_view_plan(...), of which only ANALYSIS_COLUMNS
+    are read and computed.
+    """
+    if hasattr(merged_df, "collect"):
+        merged_df = merged_df.collect(ANALYSIS_COLUMNS)
+
     print("\n--- REVENUE ANALYSIS ---\n")
 
     # Total revenue by product category
@@ -120,7 +152,9 @@ def revenue_and_customer_analysis(merged_df):
     print(revenue_by_category, "\n")
 
     # Monthly revenue trend
-    merged_df["month"] = merged_df["transaction_date"].dt.to_period("M")
+    merged_df["month"] = lookup_date_attributes(
+        merged_df["transaction_date"], ["period"]
+    )["period"]
     monthly_revenue = merged_df.groupby("month")["final_amount"].sum()
     print("Monthly Revenue Trend:")
     print(monthly_revenue, "\n")
@@ -186,15 +220,77 @@ def revenue_and_customer_analysis(merged_df):
     top_category = avg_value_by_category.idxmax()
     print(f"Category with Highest Average Transaction Value: {top_category}")
     print(avg_value_by_category.sort_values(ascending=False), "\n")
-    
-    
 
 
-merged_df = create_transaction_view(customers_df, products_df, transactions_df)
 
-merged_df = add_financial_features(merged_df)
-merged_df = add_temporal_features(merged_df)
-merged_df = add_categorical_features(merged_df)
+def main(memory_budget: int = None):
+    """
+    Every stage below is skipped when its inputs and code are unchanged.
+    With a memory_budget in bytes, cleaning deduplicates within the budget
+    and the join, feature and aggregate stages run partition by partition
+    when they would not fit (not cached, as their output is spilled to disk).
+    """
+    cache = StageCache()
+    governor = MemoryGovernor(memory_budget) if memory_budget else None
+
+    customers_df = cache.read_csv("data/original/customers.csv")
+    products_df = cache.read_csv("data/original/products.csv")
+    transactions_df = cache.read_csv("data/original/transactions.csv")
+
+    customers_df, _ = cache.run(clean_customers, customers_df, governor=governor)
+    products_df, _ = cache.run(clean_products, products_df, governor=governor)
+    # End of today: keeps today's transactions, and the cached result
+    # expires at midnight once a future date may have passed
+    end_of_today = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    transactions_df, _ = cache.run(
+        clean_transactions,
+        transactions_df,
+        governor=governor,
+        now=end_of_today - pd.Timedelta(1, "ns"),
+    )
+
+    # Same person under several customer_ids -> one cluster_id
+    resolved_customers_df, _ = cache.run(resolve_customers, customers_df)
+    transactions_df = cache.run(
+        rekey_transactions, transactions_df, resolved_customers_df
+    )
+    customers_df = cache.run(canonical_customers, resolved_customers_df)
+
+    if governor is not None:
+        # imported here: parallel_pipeline builds on this module's features
+        from parallel_pipeline import print_partitioned_analysis, run_governed_pipeline
+
+        results, _, _ = run_governed_pipeline(
+            customers_df, products_df, transactions_df, governor=governor
+        )
+        print_partitioned_analysis(results)
+        governor.cleanup()
+        return
+
+    # imported here: lazy_plan builds on this module's feature functions
+    from lazy_plan import collect_transaction_view
+
+    print(
+        "unmatched products: ",
+        int((~transactions_df["product_id"].isin(products_df["product_id"])).sum()),
+    )
+    print(
+        "unmatched customers: ",
+        int((~transactions_df["customer_id"].isin(customers_df["customer_id"])).sum()),
+    )
+
+    # Join and features over a lazy plan: only the analysis columns are
+    # merged, and feature steps none of them need are skipped
+    merged_df = cache.run(
+        collect_transaction_view,
+        customers_df,
+        products_df,
+        transactions_df,
+        columns=ANALYSIS_COLUMNS,
+    )
+
+    revenue_and_customer_analysis(merged_df)
 
 
-revenue_and_customer_analysis(merged_df)
\ No newline at end of file
+if __name__ == "__main__":
+    main()